@@ -33,6 +33,17 @@ parser.add_argument(
     "-i", "--interactive", action="store_true", dest="interactive",
     default=False, help="Interactive session with the fortune database."
 )
+parser.add_argument(
+    "-e", "--engine", "-s", "--storage", metavar="ENGINE", dest="engine",
+    default="memory",
+    choices=["memory", "array", "mmap", "block", "log", "sqlite"],
+    help="Set the storage engine of the database: 'memory' loads the "
+         "whole file as a list of strings, 'array' packs it in a single "
+         "buffer, 'mmap' maps it and indexes the record offsets, 'block' "
+         "reads a block-compressed file, 'log' a checksummed record log "
+         "and 'sqlite' an SQLite database (see dbConvert.py). "
+         "Default: memory."
+)
 opts = parser.parse_args()
 
 # -----------------------------------------------------------------------------
@@ -40,7 +51,7 @@ opts = parser.parse_args()
 # -----------------------------------------------------------------------------
 
 # Create the database object
-db = Database("dbs/fortune.db")
+db = Database("dbs/fortune.db", opts.engine)
 
 if not opts.interactive:
     # Run in the normal mode
@@ -0,0 +1,122 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Fortunes kept in memory as one contiguous blob of bytes."""
+
+import array
+import itertools
+import threading
+
+from .appendFile import AppendFile
+from .fortuneFile import SEPARATOR, ENCODING, read_chunks
+from .storageEngine import StorageEngine
+
+
+class ArrayStore(StorageEngine):
+
+    """Fortune records packed into a bytearray.
+
+    The encoded records are stored back to back, without separators,
+    in a single bytearray, and their end offsets in an array of
+    unsigned 64 bit integers: record i spans blob[ends[i-1]:ends[i]].
+    Each record thus costs its payload plus 8 bytes, instead of a
+    Python string object and a list slot. Appended records are added
+    at the end of both, in place.
+
+    The store remembers how much of the file it has loaded, so that
+    refresh() only reads what other programs appended since. Records
+    appended by another program while append_many() writes may be
+    missed, so only one program should write at a time.
+
+    Public methods:
+        --  count()
+        --  get(index)
+        --  append_many(fortunes)
+        --  refresh()
+        --  stats()
+        --  close()
+
+    """
+
+    def __init__(self, db_file, durability="flush"):
+        StorageEngine.__init__(self, db_file, durability)
+        self.lock = threading.Lock()
+        self.blob = bytearray()
+        self.ends = array.array('Q')
+        self.end = 0
+        self._load(tail=True)
+        self.out = AppendFile(db_file, durability)
+
+    # Private methods
+
+    def _add(self, records):
+        """Pack encoded records at the end of the blob."""
+        base = len(self.blob)
+        self.blob += b"".join(records)
+        self.ends.extend(base + end for end in
+                         itertools.accumulate(map(len, records)))
+
+    def _load(self, tail=False):
+        """Add the records found after the loaded part of the file."""
+        added = 0
+        for records, end in read_chunks(self.db_file, self.end, tail):
+            self._add(records)
+            self.end = end
+            added = added + len(records)
+        return added
+
+    # Public methods
+
+    def count(self):
+        """Return the number of records."""
+        return len(self.ends)
+
+    def get(self, index):
+        """Return the record with the given index."""
+        start = self.ends[index - 1] if index > 0 else 0
+        return self.blob[start:self.ends[index]].decode(ENCODING, "replace")
+
+    def append_many(self, fortunes):
+        """Append several records with a single write to the file."""
+        records = [f.encode(ENCODING) for f in fortunes]
+        data = b"".join(r + SEPARATOR for r in records)
+        self.lock.acquire()
+        try:
+            if self.out.size() > self.end:
+                # Another program has appended to the file since we
+                # last wrote to it: load its records first.
+                self.out.flush()
+                self._load()
+            self.out.append(data)
+            self._add(records)
+            # Skip an unterminated record another program may have left
+            # before ours.
+            self.end = self.out.tell()
+        finally:
+            self.lock.release()
+
+    def refresh(self):
+        """Load the records appended to the file by other programs.
+
+        Return the number of new records.
+
+        """
+        self.lock.acquire()
+        try:
+            self.out.flush()
+            return self._load()
+        finally:
+            self.lock.release()
+
+    def stats(self):
+        """Return the statistics of the writes to the file."""
+        return self.out.stats()
+
+    def close(self):
+        self.out.close()
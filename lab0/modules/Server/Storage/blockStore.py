@@ -0,0 +1,282 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Fortune file made of zlib-compressed blocks of records.
+
+File layout:
+    --  MAGIC,
+    --  a sequence of blocks, each made of a BLOCK_HEADER (length of
+        the compressed data, number of records, CRC-32 of the
+        compressed data) followed by the compressed data. Once
+        decompressed, a block holds the lengths of its records, as
+        little endian 32 bit integers, followed by the records.
+
+"""
+
+import array
+import bisect
+import collections
+import itertools
+import os
+import struct
+import threading
+import zlib
+
+from .appendFile import AppendFile
+from .fortuneFile import SEPARATOR, ENCODING, read_chunks
+from .storageEngine import StorageEngine
+
+MAGIC = b"FORTBLK1"
+BLOCK_HEADER = struct.Struct("<III")
+BLOCK_SIZE = 16 * 1024
+CACHE_BLOCKS = 16
+
+
+def pack_blocks(records, block_size=BLOCK_SIZE):
+    """Return the encoded records packed into compressed blocks."""
+    blocks = []
+    start = 0
+    size = 0
+    for i, record in enumerate(records):
+        size = size + len(record)
+        if size >= block_size or i == len(records) - 1:
+            group = records[start:i + 1]
+            raw = (struct.pack("<{}I".format(len(group)),
+                               *map(len, group)) + b"".join(group))
+            data = zlib.compress(raw)
+            blocks.append(BLOCK_HEADER.pack(len(data), len(group),
+                                            zlib.crc32(data)) + data)
+            start = i + 1
+            size = 0
+    return b"".join(blocks)
+
+
+def unpack_block(data, count):
+    """Decompress a block.
+
+    Return the uncompressed data and the offsets of the records in it:
+    record i spans data[offsets[i]:offsets[i + 1]].
+
+    """
+    raw = zlib.decompress(data)
+    lengths = struct.unpack_from("<{}I".format(count), raw)
+    offsets = list(itertools.accumulate((count * 4,) + lengths))
+    return raw, offsets
+
+
+def block_records(block):
+    """Return the list of encoded records of an unpacked block."""
+    raw, offsets = block
+    return [raw[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+
+class BlockStore(StorageEngine):
+
+    """Fortune file compressed by blocks, with random access.
+
+    Only the offset and the index of the first record of each block
+    are kept in memory. Reading a record decompresses the block holding
+    it; the last CACHE_BLOCKS decompressed blocks are kept in an LRU
+    cache. Every commit is written as new blocks of at most block_size
+    bytes of uncompressed records, so a file built by many small
+    commits compresses worse than a converted one; converting it again
+    (dbConvert.py) packs it into full blocks.
+
+    A block torn by a crash is cut off the file when it is opened,
+    unless read_only is True: the store then leaves the file as it
+    is, skips the torn block and cannot be appended to.
+
+    Public methods:
+        --  count()
+        --  get(index)
+        --  append_many(fortunes)
+        --  refresh()
+        --  iterate()
+        --  stats()
+        --  close()
+
+    """
+
+    def __init__(self, db_file, durability="flush", block_size=BLOCK_SIZE,
+                 cache_blocks=CACHE_BLOCKS, read_only=False):
+        StorageEngine.__init__(self, db_file, durability)
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        self.lock = threading.Lock()
+        self.cache = collections.OrderedDict()
+        self.block_offsets = array.array('Q')
+        self.block_firsts = array.array('Q')
+        self.records = 0
+        if not read_only and (not os.path.exists(db_file) or
+                              os.path.getsize(db_file) == 0):
+            with open(db_file, 'wb') as f:
+                f.write(MAGIC)
+        self.fd = os.open(db_file, os.O_RDONLY)
+        if os.pread(self.fd, len(MAGIC), 0) != MAGIC:
+            raise ValueError("'{}' is not a block-compressed fortune file."
+                             .format(db_file))
+        self.end = len(MAGIC)
+        self.out = None
+        if read_only:
+            self._load_index()
+            return
+        if self._load_index() != os.fstat(self.fd).st_size:
+            # Drop the block torn by a crash in the middle of a write.
+            os.truncate(db_file, self.end)
+        self.out = AppendFile(db_file, durability)
+
+    # Private methods
+
+    def _load_index(self):
+        """Index the complete blocks found after the indexed ones.
+
+        Return the size of the file.
+
+        """
+        size = os.fstat(self.fd).st_size
+        pos = self.end
+        while pos + BLOCK_HEADER.size <= size:
+            length, count, crc = BLOCK_HEADER.unpack(
+                os.pread(self.fd, BLOCK_HEADER.size, pos))
+            if pos + BLOCK_HEADER.size + length > size:
+                break
+            self.block_offsets.append(pos)
+            self.block_firsts.append(self.records)
+            self.records = self.records + count
+            pos = pos + BLOCK_HEADER.size + length
+        self.end = pos
+        return size
+
+    def _block(self, b):
+        """Return block b unpacked, from the cache if possible."""
+        self.lock.acquire()
+        try:
+            if b in self.cache:
+                self.cache.move_to_end(b)
+                return self.cache[b]
+        finally:
+            self.lock.release()
+        offset = self.block_offsets[b]
+        header = os.pread(self.fd, BLOCK_HEADER.size, offset)
+        length, count, crc = BLOCK_HEADER.unpack(header)
+        data = os.pread(self.fd, length, offset + BLOCK_HEADER.size)
+        if zlib.crc32(data) != crc:
+            raise IOError("Block {} of '{}' is corrupted."
+                          .format(b, self.db_file))
+        block = unpack_block(data, count)
+        self.lock.acquire()
+        try:
+            self.cache[b] = block
+            if len(self.cache) > self.cache_blocks:
+                self.cache.popitem(last=False)
+        finally:
+            self.lock.release()
+        return block
+
+    # Public methods
+
+    def count(self):
+        """Return the number of records in the file."""
+        return self.records
+
+    def get(self, index):
+        """Return the record with the given index."""
+        b = bisect.bisect_right(self.block_firsts, index) - 1
+        i = index - self.block_firsts[b]
+        raw, offsets = self._block(b)
+        return raw[offsets[i]:offsets[i + 1]].decode(ENCODING, "replace")
+
+    def append_many(self, fortunes):
+        """Append several records to the file with a single write."""
+        if self.out is None:
+            raise IOError("'{}' is opened read-only.".format(self.db_file))
+        records = [f.encode(ENCODING) for f in fortunes]
+        if not records:
+            return
+        data = pack_blocks(records, self.block_size)
+        self.out.append(data)
+        # Blocks are read back from the file.
+        self.out.flush()
+        self.refresh()
+
+    def refresh(self):
+        """Index the blocks appended to the file by other programs.
+
+        Return the number of new records.
+
+        """
+        self.lock.acquire()
+        try:
+            before = self.records
+            self._load_index()
+            return self.records - before
+        finally:
+            self.lock.release()
+
+    def iterate(self):
+        """Yield all the records in order, one block at a time."""
+        for b in range(len(self.block_offsets)):
+            for record in block_records(self._block(b)):
+                yield record.decode(ENCODING, "replace")
+
+    def stats(self):
+        """Return the statistics of the writes to the file."""
+        stats = self.out.stats() if self.out is not None else {}
+        stats["blocks"] = len(self.block_offsets)
+        stats["file_bytes"] = self.end
+        return stats
+
+    def close(self):
+        if self.out is not None:
+            self.out.close()
+        os.close(self.fd)
+
+
+def convert_to_blocks(text_file, block_file, block_size=BLOCK_SIZE):
+    """Convert a '%'-separated fortune file into the block format.
+
+    Return the number of records converted.
+
+    """
+    count = 0
+    with open(block_file, 'wb') as f:
+        f.write(MAGIC)
+        pending = []
+        size = 0
+        for records, end in read_chunks(text_file):
+            for record in records:
+                pending.append(record)
+                size = size + len(record)
+                if size >= block_size:
+                    f.write(pack_blocks(pending, block_size))
+                    count = count + len(pending)
+                    pending = []
+                    size = 0
+        if pending:
+            f.write(pack_blocks(pending, block_size))
+            count = count + len(pending)
+    return count
+
+
+def convert_from_blocks(block_file, text_file):
+    """Convert a block-compressed fortune file into the '%' format.
+
+    The block file is not modified: a torn block is left out. Return
+    the number of records converted.
+
+    """
+    store = BlockStore(block_file, read_only=True)
+    try:
+        with open(text_file, 'wb') as f:
+            for b in range(len(store.block_offsets)):
+                records = block_records(store._block(b))
+                f.write(b"".join(r + SEPARATOR for r in records))
+        return store.count()
+    finally:
+        store.close()
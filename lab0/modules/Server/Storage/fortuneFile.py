@@ -0,0 +1,41 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Format of the '%'-separated fortune file."""
+
+SEPARATOR = b"\n%\n"
+ENCODING = "utf-8"
+
+# Size of the pieces in which a fortune file is read.
+CHUNK_SIZE = 1 << 20
+
+
+def read_chunks(path, start=0, tail=True, chunk_size=CHUNK_SIZE):
+    """Yield the encoded records of a fortune file, a list at a time.
+
+    The file is read from offset start, and each list comes with the
+    offset just after its last record. The records are returned without
+    their separators. If tail is True, a last record not terminated by
+    a separator is returned as well, unless it is blank.
+
+    """
+    rest = b""
+    pos = start
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            pos = pos + len(chunk)
+            records = (rest + chunk).split(SEPARATOR)
+            rest = records.pop()
+            yield records, pos - len(rest)
+    if tail and rest.strip() != b"":
+        yield [rest.rstrip(b"\n")], pos
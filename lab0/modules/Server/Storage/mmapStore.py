@@ -0,0 +1,191 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Memory-mapped fortune file with an index of record offsets."""
+
+import array
+import mmap
+import os
+import threading
+
+from .appendFile import AppendFile
+from .fortuneFile import SEPARATOR, ENCODING
+from .indexFile import IndexFile
+from .storageEngine import StorageEngine
+
+
+class MmapStore(StorageEngine):
+
+    """Fortune file accessed through mmap.
+
+    Only the offsets at which the records start are kept in memory, in
+    an array of unsigned 64 bit integers, so the memory and the time
+    needed to open the file grow with the number of records and not
+    with the size of the file. A record is the text between two "%"
+    separator lines; it is decoded only when it is read.
+
+    Unless persist_index is False, the offsets are also kept in a
+    sidecar file (see IndexFile) so that reopening the store only scans
+    the part of the file appended since the index was last updated.
+
+    The records are read back from the file, so appended data is
+    always handed to the OS before being indexed: the "buffered"
+    durability behaves as "flush" here.
+
+    Public methods:
+        --  count()
+        --  get(index)
+        --  append_many(fortunes)
+        --  refresh()
+        --  stats()
+        --  close()
+
+    """
+
+    def __init__(self, db_file, durability="flush", persist_index=True):
+        StorageEngine.__init__(self, db_file, durability)
+        self.lock = threading.Lock()
+        self.f = open(db_file, 'rb')
+        self.out = AppendFile(db_file, durability)
+        self.mm = None
+        self.size = 0
+        self.scanned = 0
+        self.starts = array.array('Q', [0])
+        self.has_tail = False
+        self.index = None
+        if persist_index:
+            try:
+                self.index = IndexFile(db_file + ".idx")
+            except OSError:
+                # No index if the directory is not writable.
+                self.index = None
+        self._remap()
+        loaded = None
+        if self.index is not None:
+            loaded = self.index.load(self.mm, self.size)
+        if loaded is not None:
+            self.starts, self.scanned = loaded
+        elif self.size >= 2 and self.mm[:2] == SEPARATOR[1:]:
+            # The file starts directly with a separator line.
+            self.starts[0] = 2
+        self._scan()
+        # A last record without a separator is only served if it is
+        # there when the file is opened (a file written by hand); later
+        # ones wait for their separator, as their writer may not be
+        # done with them.
+        self.has_tail = (self.mm is not None and
+                         self.mm[self.starts[-1]:self.size].strip() != b"")
+        if self.index is not None:
+            if loaded is None:
+                self.index.save(self.starts, self.scanned, self.mm)
+            else:
+                self.index.update(self.starts, self.scanned, self.mm)
+
+    # Private methods
+
+    def _remap(self):
+        """Map the file again if it has grown since the last mapping.
+
+        The old map is not closed: readers still holding it keep on
+        seeing the records it covers.
+
+        """
+        size = os.fstat(self.f.fileno()).st_size
+        if size > self.size:
+            self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.size = size
+
+    def _scan(self):
+        """Index the separators found after the last scanned position."""
+        mm = self.mm
+        size = self.size
+        if mm is None:
+            return
+        pos = max(self.starts[-1], self.scanned - len(SEPARATOR) + 1)
+        new_starts = array.array('Q')
+        while True:
+            p = mm.find(SEPARATOR, pos, size)
+            if p < 0:
+                break
+            pos = p + len(SEPARATOR)
+            new_starts.append(pos)
+        self.scanned = size
+        if new_starts:
+            # The tail record, if any, has got its separator.
+            self.has_tail = False
+        self.starts.extend(new_starts)
+
+    def _refresh(self):
+        self._remap()
+        self._scan()
+        if self.index is not None:
+            self.index.update(self.starts, self.scanned, self.mm)
+
+    # Public methods
+
+    def count(self):
+        """Return the number of records in the file."""
+        return len(self.starts) - 1 + self.has_tail
+
+    def get(self, index):
+        """Return the record with the given index."""
+        start = self.starts[index]
+        if index + 1 < len(self.starts):
+            end = self.starts[index + 1] - len(SEPARATOR)
+        else:
+            # Last record, not yet terminated by a separator.
+            end = self.size
+            if self.mm[end - 1:end] == b"\n":
+                end = end - 1
+        return self.mm[start:end].decode(ENCODING, "replace")
+
+    def append_many(self, fortunes):
+        """Append several records to the file with a single write."""
+        data = b"".join(f.encode(ENCODING) + SEPARATOR for f in fortunes)
+        self.lock.acquire()
+        try:
+            if self.has_tail:
+                # Terminate the last record, so that ours do not get
+                # glued to it.
+                if self.mm[self.size - 1:self.size] == b"\n":
+                    data = SEPARATOR[1:] + data
+                else:
+                    data = SEPARATOR + data
+            self.out.append(data)
+            if self.out.durability == "buffered":
+                self.out.flush()
+            self._refresh()
+        finally:
+            self.lock.release()
+
+    def refresh(self):
+        """Index the records appended to the file by other programs.
+
+        The new offsets are published with a single extend of the
+        offset array, so readers never see a partly indexed tail.
+        Return the number of new records.
+
+        """
+        self.lock.acquire()
+        try:
+            before = self.count()
+            self._refresh()
+            return self.count() - before
+        finally:
+            self.lock.release()
+
+    def stats(self):
+        """Return the statistics of the writes to the file."""
+        return self.out.stats()
+
+    def close(self):
+        if self.index is not None:
+            self.index.close()
+        self.out.close()
+        self.f.close()
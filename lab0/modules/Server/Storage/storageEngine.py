@@ -0,0 +1,86 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Interface of the storage engines of the fortune database."""
+
+
+class StorageEngine(object):
+
+    """Base class of the storage engines.
+
+    An engine is opened by constructing it with the database file and
+    the durability of the writes (see AppendFile), and keeps the
+    records in the order they were appended: record i is the i-th
+    fortune of the file. Subclasses implement count(), get() and
+    append_many(); the other methods have defaults written in terms of
+    these.
+
+    Database only calls append() and append_many() while holding its
+    exclusive lock, but may call the other methods from several
+    threads at once, concurrently with an append.
+
+    Public methods:
+        --  count()
+        --  get(index)
+        --  append(fortune)
+        --  append_many(fortunes)
+        --  refresh()
+        --  iterate()
+        --  watched_file()
+        --  stats()
+        --  close()
+
+    """
+
+    def __init__(self, db_file, durability="flush"):
+        self.db_file = db_file
+        self.durability = durability
+
+    # Public methods
+
+    def count(self):
+        """Return the number of records."""
+        raise NotImplementedError()
+
+    def get(self, index):
+        """Return the record with the given index."""
+        raise NotImplementedError()
+
+    def append(self, fortune):
+        """Append a record."""
+        self.append_many([fortune])
+
+    def append_many(self, fortunes):
+        """Append several records at once."""
+        raise NotImplementedError()
+
+    def refresh(self):
+        """Load the records appended by other programs.
+
+        Return the number of new records.
+
+        """
+        return 0
+
+    def iterate(self):
+        """Yield all the records in order."""
+        for i in range(self.count()):
+            yield self.get(i)
+
+    def watched_file(self):
+        """Return the file that changes when records are appended."""
+        return self.db_file
+
+    def stats(self):
+        """Return statistics about the writes."""
+        return {"durability": self.durability}
+
+    def close(self):
+        """Release the resources held by the engine."""
+        pass
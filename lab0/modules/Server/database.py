@@ -10,45 +10,242 @@
 """Implementation of a simple database class."""
 
 import random
+import threading
+
+from .groupCommit import GroupCommit
+from .invertedIndex import InvertedIndex
+from .tailWatcher import TailWatcher, POLL_INTERVAL
+from .Storage.arrayStore import ArrayStore
+from .Storage.blockStore import BlockStore
+from .Storage.listStore import ListStore
+from .Storage.logStore import LogStore
+from .Storage.mmapStore import MmapStore
+from .Storage.sqliteStore import SqliteStore
+
+engines = {
+    "memory": ListStore,
+    "array": ArrayStore,
+    "mmap": MmapStore,
+    "block": BlockStore,
+    "log": LogStore,
+    "sqlite": SqliteStore
+}
 
 
 class Database(object):
 
-    """Class containing a database implementation."""
+    """Class containing a database implementation.
+
+    The fortunes are kept by one of the following storage engines (see
+    StorageEngine):
+        --  "memory" :: the flat file is read and split into a list of
+            strings, see ListStore (the default),
+        --  "array"  :: the records of the flat file are packed in a
+            single bytearray with an array of their offsets, see
+            ArrayStore,
+        --  "mmap"   :: the flat file is memory-mapped and only the
+            offsets of the records are kept in memory, see MmapStore,
+        --  "block"  :: the file is in the block-compressed format and
+            only the blocks being read are decompressed, see BlockStore,
+        --  "log"    :: the file is a log of length-prefixed records with
+            a checksum each, memory-mapped like with "mmap", see
+            LogStore,
+        --  "sqlite" :: the file is an SQLite database in WAL mode, see
+            SqliteStore.
+    The "block", "log" and "sqlite" files are made with dbConvert.py.
+
+    Writes go through a GroupCommit: a writer calls enqueue() before
+    taking the exclusive lock of the database and commit() once it
+    holds it, so that the writers queued on the lock share a single
+    append to the file. write() does both, for callers that do not
+    share the database between threads. How durable a commit is can
+    be chosen with the durability argument, see AppendFile.
+
+    If search_index is True, an InvertedIndex of the words of the
+    fortunes is built when the database is opened and kept up to date
+    on every commit; it serves search() and random_matching().
 
-    def __init__(self, db_file):
+    Records appended to the file by other programs are picked up by
+    refresh(). If follow is True, a TailWatcher calls refresh() every
+    time the file changes, so that a running server serves them without
+    a restart; follow_interval is how often the file is polled where
+    inotify is not available.
+
+    read() and read_many() only see the records published by the last
+    commit or refresh: the engines only ever append to their record
+    arrays, so the number of records is all a reader needs to know, and
+    it is published with a single assignment once the records are
+    complete. If snapshots is True, the callers may therefore read
+    without taking the readers-writer lock at all; the writers still
+    need its exclusive side among themselves.
+
+    """
+
+    def __init__(self, db_file, engine="memory", durability="flush",
+                 search_index=False, follow=False,
+                 follow_interval=POLL_INTERVAL, snapshots=False):
+        if engine not in engines:
+            raise ValueError("Unknown storage engine: '{}'".format(engine))
         self.db_file = db_file
         self.rand = random.Random()
         self.rand.seed()
-        #
-        # Your code here.
-        #
-        f = open(db_file, 'r')
-        self.db = f.read().split('%')
-        f.close()
+        self.engine = engine
+        self.snapshots = snapshots
+        self.lock = threading.Lock()
+        self.refreshes = 0
+        self.refreshed = 0
+        self.group = GroupCommit(self._flush)
+        self.store = engines[engine](db_file, durability)
+        self.terms = None
+        if search_index:
+            self.terms = InvertedIndex()
+            for i, fortune in enumerate(self.store.iterate()):
+                self.terms.add(i, fortune)
+        self.snapshot = self.store.count()
+        self.watcher = None
+        if follow:
+            self.watcher = TailWatcher(self.store.watched_file(),
+                                       self.refresh, follow_interval)
+            self.watcher.start()
+
+    # Private methods
+
+    def _index(self, first):
+        """Add the records from index first on to the search index."""
+        if self.terms is not None:
+            for i in range(first, self.store.count()):
+                self.terms.add(i, self.store.get(i))
 
-        #end my code    
+    def _flush(self, fortunes):
+        """Append a batch of fortunes to the database file."""
+        self.lock.acquire()
+        try:
+            first = self.store.count()
+            self.store.append_many(fortunes)
+            self._index(first)
+            self.snapshot = self.store.count()
+        finally:
+            self.lock.release()
+
+    # Public methods
 
     def read(self):
         """Read a random location in the database."""
         #
         # Your code here.
         #
-        nr_entries = len(self.db)
-        rand_index = self.rand.randint(0, nr_entries-1)
-        return self.db[rand_index]
+        index = self.random_index()
+        if index is None:
+            # An empty database reads as an empty fortune.
+            return ""
+        return self.store.get(index)
 
         #end my code
 
+    def random_index(self):
+        """Return a random index of the published records.
+
+        Return None if there are none.
+
+        """
+        nr_entries = self.snapshot
+        if nr_entries == 0:
+            return None
+        return self.rand.randint(0, nr_entries-1)
+
+    def get(self, index):
+        """Return the record with the given index."""
+        return self.store.get(index)
+
+    def read_many(self, n):
+        """Read n random locations in the database."""
+        return [self.read() for i in range(n)]
+
+    def search(self, term, limit=10):
+        """Return at most limit fortunes containing all words of term."""
+        if self.terms is None:
+            raise ValueError("The database has no search index.")
+        return [self.store.get(i) for i in self.terms.lookup(term, limit)]
+
+    def random_matching(self, term):
+        """Return a random fortune containing all words of term.
+
+        Return None if no fortune matches.
+
+        """
+        if self.terms is None:
+            raise ValueError("The database has no search index.")
+        index = self.terms.random_lookup(term, self.rand)
+        if index is None:
+            return None
+        return self.store.get(index)
+
     def write(self, fortune):
         """Write a new fortune to the database."""
-        #
-        # Your code here.
-        #
-        self.db.append(fortune)
-        f = open(self.db_file, 'a')
-        f.write(fortune + "\n%\n")
-        f.close()
+        self.commit(self.enqueue(fortune))
 
-        #end my code
+    def write_many(self, fortunes):
+        """Write several fortunes to the database at once."""
+        self.commit(self.enqueue_many(fortunes))
+
+    def enqueue(self, fortune):
+        """Queue a fortune for the next commit and return its ticket."""
+        return self.group.enqueue(fortune)
+
+    def enqueue_many(self, fortunes):
+        """Queue several fortunes under a single ticket."""
+        return self.group.enqueue_many(list(fortunes))
+
+    def cancel(self, ticket):
+        """Drop queued fortunes that have not been committed yet."""
+        return self.group.cancel(ticket)
+
+    def commit(self, ticket):
+        """Write the queued fortunes, unless ticket is already written.
+
+        Must be called while holding the exclusive lock of the
+        database. Return the number of fortunes written.
+
+        """
+        return self.group.commit(ticket)
+
+    def refresh(self):
+        """Load the records appended to the file by other programs.
+
+        Return the number of new records.
+
+        """
+        self.lock.acquire()
+        try:
+            first = self.store.count()
+            self.store.refresh()
+            self._index(first)
+            self.snapshot = self.store.count()
+            added = self.snapshot - first
+            self.refreshes = self.refreshes + 1
+            self.refreshed = self.refreshed + added
+            return added
+        finally:
+            self.lock.release()
+
+    def stats(self):
+        """Return statistics about the database."""
+        stats = {
+            "engine": self.engine,
+            "commits": self.group.stats(),
+            "writes": self.store.stats()
+        }
+        if self.terms is not None:
+            stats["search_index"] = self.terms.stats()
+        if self.watcher is not None:
+            stats["follow"] = {
+                "refreshes": self.refreshes,
+                "records": self.refreshed
+            }
+        return stats
 
+    def close(self):
+        """Release the resources held by the storage engine."""
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.store.close()
@@ -16,6 +16,14 @@ import socket
 import json
 import argparse
 import builtins
+import itertools
+import random
+import select
+import threading
+import time
+
+sys.path.append("../modules")
+from Common import framing
 
 # -----------------------------------------------------------------------------
 # Initialize and read the command line arguments
@@ -42,6 +50,50 @@ parser.add_argument(
     "-i", "--interactive", action="store_true", dest="interactive",
     default=False, help="Interactive session with the fortune database."
 )
+parser.add_argument(
+    "-n", "--read-many", metavar="N", dest="read_many", type=int,
+    help="Read N random fortunes from the database in a single request."
+)
+parser.add_argument(
+    "-l", "--load", metavar="FILE", dest="load",
+    help="Write all the fortunes of FILE to the database. The fortunes "
+         "are separated by lines containing only '%%', as in dbs/fortune.db."
+)
+parser.add_argument(
+    "-b", "--batch-size", metavar="SIZE", dest="batch_size", type=int,
+    default=1000, help="Number of fortunes sent per request by --load. "
+                       "Default: 1000."
+)
+parser.add_argument(
+    "-s", "--search", metavar="TERM", dest="search",
+    help="Print the fortunes containing all the words of TERM."
+)
+parser.add_argument(
+    "-m", "--matching", metavar="TERM", dest="matching",
+    help="Read a random fortune containing all the words of TERM."
+)
+parser.add_argument(
+    "--limit", metavar="N", dest="limit", type=int, default=10,
+    help="Maximum number of fortunes printed by --search. Default: 10."
+)
+parser.add_argument(
+    "--stats", action="store_true", dest="stats", default=False,
+    help="Print the statistics of the server: database and lock."
+)
+parser.add_argument(
+    "--timeout", metavar="SECONDS", dest="timeout", type=float,
+    help="Deadline of each request: the server drops the requests it "
+         "could not start on within this time."
+)
+parser.add_argument(
+    "--retries", metavar="N", dest="retries", type=int, default=3,
+    help="Number of times a request turned away by a busy server is "
+         "sent again, after a growing random pause. Default: 3."
+)
+parser.add_argument(
+    "--json-lines", action="store_false", dest="binary", default=True,
+    help="Send JSON lines instead of negotiating binary frames."
+)
 parser.add_argument(
     "address", type=address, nargs=1, metavar="addr:port",
     help="Server address."
@@ -49,6 +101,24 @@ parser.add_argument(
 opts = parser.parse_args()
 server_address = opts.address[0]
 
+
+def read_fortunes(path):
+    """Return the fortunes of a '%'-separated fortune file."""
+    with open(path, 'r') as f:
+        text = f.read()
+    fortunes = [fortune.strip("\n") for fortune in text.split("\n%\n")]
+    return [fortune for fortune in fortunes if fortune.strip() != ""]
+
+
+def load(db, path, batch_size):
+    """Write the fortunes of a file to the database, in batches."""
+    fortunes = read_fortunes(path)
+    # Send all the batches at once, without waiting for each result.
+    db.request_many([{"method": "write_many",
+                      "args": [fortunes[i:i + batch_size]]}
+                     for i in range(0, len(fortunes), batch_size)])
+    return len(fortunes)
+
 # -----------------------------------------------------------------------------
 # Auxiliary classes
 # -----------------------------------------------------------------------------
@@ -58,36 +128,265 @@ class ComunicationError(Exception):
     pass
 
 
+class BusyError(Exception):
+
+    """The server is overloaded or the database is busy; try again."""
+
+    pass
+
+
+class DeadlineExceeded(Exception):
+
+    """The deadline of the request passed before the server started it."""
+
+    pass
+
+
+# Error codes of the requests that the server did not process.
+RETRY = {"busy", "deadline_exceeded"}
+
+
 class DatabaseProxy(object):
 
-    """Class that simulates the behavior of the database class."""
+    """Class that simulates the behavior of the database class.
+
+    The proxy keeps its connection to the server open between calls,
+    and opens a new one when the server has closed it. Every request
+    carries an id, so several threads may share the proxy: they send
+    their requests without waiting for each other, and whichever one
+    is reading the connection hands the results to their callers.
+
+    With binary set, the proxy asks for binary frames (see the framing
+    module) on each new connection, and stays with JSON lines if the
+    server does not know them.
+
+    A server that answers the _negotiate request with an error, or
+    answers a request without its id, is an older one: it answers a
+    single request per connection, and then closes it. The proxy then
+    sends JSON lines on a connection per request to that server, and
+    sends again the requests that it has not answered.
 
-    def __init__(self, server_address):
+    With a timeout, each request carries a deadline that far in the
+    future. The requests the server turns away without processing them
+    (the errors with a "busy" or "deadline_exceeded" code) are sent
+    again, up to retries times, after a random pause of up to backoff
+    seconds, doubled on each attempt.
+
+    """
+
+    def __init__(self, server_address, binary=True, timeout=None,
+                 retries=3, backoff=0.05):
         self.address = server_address
+        self.binary = binary
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.retried = 0
+        self.framing = "json"
+        self.cond = threading.Condition()
+        self.ids = itertools.count()
+        self.sock = None
+        self.reading = False
+        self.results = {}
+        self.outstanding = 0
+        self.reuse = True
+        # Ids of the requests sent on the connection, not yet answered.
+        self.sent = []
 
-    # Public methods
+    # Private methods
 
-    def request(self, msg):
-        sock = socket.create_connection(self.address)
-        conn = sock.makefile(mode="rw")
-    
-        conn.write(json.dumps(msg) + '\n')
-        conn.flush()
+    def _connect(self):
+        """Make sure there is an open connection; call with cond held."""
+        if self.sock is not None and self.outstanding == 0:
+            # Find out whether the server has closed an idle connection.
+            readable, w, x = select.select([self.sock], [], [], 0)
+            if readable and not self.sock.recv(1, socket.MSG_PEEK):
+                self._disconnect()
+        if self.sock is None:
+            self.sock = socket.create_connection(self.address)
+            self.reader = self.sock.makefile(mode="rb")
+            self.writer = self.sock.makefile(mode="wb")
+            self.framing = "json"
+            if self.binary:
+                self._negotiate()
+
+    def _negotiate(self):
+        """Ask the server for binary frames; call before any request."""
+        msg = {"method": framing.NEGOTIATE, "args": [framing.BINARY]}
+        self.writer.write((json.dumps(msg) + '\n').encode())
+        self.writer.flush()
+        line = self.reader.readline()
+        if not line:
+            self._disconnect()
+            raise ComunicationError("The server closed the connection.")
+        answer = json.loads(line)
+        if "result" not in answer:
+            # The server only knows JSON lines, a request per connection.
+            self.reuse = False
+            self._disconnect()
+            return
+        self.framing = answer["result"]
+
+    def _disconnect(self):
+        self.reader.close()
+        self.writer.close()
+        self.sock.close()
+        self.sock = None
+        self.sent = []
 
-        result = json.loads(conn.readline())
-        conn.close()
+    def _receive(self, id):
+        """Wait for the result of request id; call with cond held."""
+        while id not in self.results:
+            if self.reading:
+                self.cond.wait()
+                continue
+            if self.sock is None:
+                raise ComunicationError("The server closed the connection.")
+            self.reading = True
+            reader = self.reader
+            self.cond.release()
+            try:
+                if self.framing == framing.BINARY:
+                    result = framing.read_frame(reader)
+                else:
+                    line = reader.readline()
+                    result = json.loads(line) if line else None
+            finally:
+                self.cond.acquire()
+                self.reading = False
+                self.cond.notify_all()
+            if result is None:
+                self._disconnect()
+                raise ComunicationError("The server closed the connection.")
+            if "id" in result:
+                answered = result["id"]
+                if answered in self.sent:
+                    self.sent.remove(answered)
+            elif self.sent:
+                # An older server, which does not echo the ids, answers
+                # the first request of the connection only, and the
+                # others are not answered at all.
+                self.reuse = False
+                answered = self.sent[0]
+                self._disconnect()
+            else:
+                self._disconnect()
+                raise ComunicationError("Unexpected answer of the server.")
+            self.results[answered] = result
+        return self.results.pop(id)
 
+    def _check(self, result):
         if "error" in result:
             # #there has been an exception on the server,
             # #find out which and raise it here on the client
             err = result["error"]
-            exc = getattr(globals(), err["name"], None)
+            exc = (globals().get(err["name"]) or
+                   getattr(builtins, err["name"], None))
 
             if exc is not None:
                 raise exc(*err["args"])
 
         return result["result"]
-    
+
+    def _pipeline(self, msgs, results):
+        """Send requests on the connection; call with cond held.
+
+        The answers are stored in results; those of the requests that
+        an older server has dropped with the connection are left None.
+
+        """
+        ids = []
+        for msg in msgs:
+            msg = dict(msg, id=next(self.ids))
+            if self.timeout is not None:
+                msg["deadline"] = time.time() + self.timeout
+            ids.append(msg["id"])
+            if self.framing == framing.BINARY:
+                self.writer.write(framing.pack(msg))
+            else:
+                self.writer.write((json.dumps(msg) + '\n').encode())
+        self.sent.extend(ids)
+        self.writer.flush()
+        self.outstanding = self.outstanding + len(ids)
+        try:
+            for i, id in enumerate(ids):
+                try:
+                    results[i] = self._receive(id)
+                except ComunicationError:
+                    if self.reuse:
+                        raise
+        finally:
+            self.outstanding = self.outstanding - len(ids)
+
+    def _send_one(self, msg):
+        """Send a request as a JSON line on a connection of its own."""
+        msg = dict(msg)
+        if self.timeout is not None:
+            msg["deadline"] = time.time() + self.timeout
+        sock = socket.create_connection(self.address)
+        try:
+            sock.sendall((json.dumps(msg) + '\n').encode())
+            line = sock.makefile(mode="rb").readline()
+        finally:
+            sock.close()
+        if not line:
+            raise ComunicationError("The server closed the connection.")
+        return json.loads(line)
+
+    def _send_many(self, msgs):
+        """Send several requests at once; return their answers in order."""
+        results = [None] * len(msgs)
+        self.cond.acquire()
+        try:
+            if self.reuse:
+                self._connect()
+            if self.reuse:
+                self._pipeline(msgs, results)
+        finally:
+            self.cond.release()
+        # An older server gets the requests it has not answered one at
+        # a time.
+        for i, msg in enumerate(msgs):
+            if results[i] is None:
+                results[i] = self._send_one(msg)
+        return results
+
+    # Public methods
+
+    def request_many(self, msgs):
+        """Send several requests at once; return their results in order.
+
+        The requests turned away by the server are retried; the first
+        error of the requests is raised once all the results have
+        arrived.
+
+        """
+        results = [None] * len(msgs)
+        todo = list(range(len(msgs)))
+        for attempt in range(self.retries + 1):
+            if attempt > 0:
+                self.retried = self.retried + len(todo)
+                pause = self.backoff * 2 ** (attempt - 1)
+                time.sleep(random.uniform(0, pause))
+            answers = self._send_many([msgs[i] for i in todo])
+            for i, answer in zip(todo, answers):
+                results[i] = answer
+            todo = [i for i in todo
+                    if results[i].get("error", {}).get("code") in RETRY]
+            if not todo:
+                break
+        return [self._check(result) for result in results]
+
+    def request(self, msg):
+        return self.request_many([msg])[0]
+
+    def close(self):
+        self.cond.acquire()
+        try:
+            if self.sock is not None:
+                self._disconnect()
+        finally:
+            self.cond.release()
 
     def read(self):
         #
@@ -103,6 +402,21 @@ class DatabaseProxy(object):
         #
         self.request({"method":"write", "args":[fortune]})
 
+    def read_many(self, n):
+        return self.request({"method": "read_many", "args": [n]})
+
+    def write_many(self, fortunes):
+        self.request({"method": "write_many", "args": [fortunes]})
+
+    def search(self, term, limit=10):
+        return self.request({"method": "search", "args": [term, limit]})
+
+    def random_matching(self, term):
+        return self.request({"method": "random_matching", "args": [term]})
+
+    def stats(self):
+        return self.request({"method": "stats", "args": []})
+
     def costum(self, msg):
         self.request(msg)
 
@@ -111,12 +425,25 @@ class DatabaseProxy(object):
 # -----------------------------------------------------------------------------
 
 # Create the database object.
-db = DatabaseProxy(server_address)
+db = DatabaseProxy(server_address, opts.binary, opts.timeout, opts.retries)
 
 if not opts.interactive:
     # Run in the normal mode.
     if opts.fortune is not None:
         db.write(opts.fortune)
+    elif opts.load is not None:
+        n = load(db, opts.load, opts.batch_size)
+        print("Wrote {} fortunes.".format(n))
+    elif opts.read_many is not None:
+        for fortune in db.read_many(opts.read_many):
+            print(fortune)
+    elif opts.search is not None:
+        for fortune in db.search(opts.search, opts.limit):
+            print(fortune)
+    elif opts.matching is not None:
+        print(db.random_matching(opts.matching))
+    elif opts.stats:
+        print(json.dumps(db.stats(), indent=4, sort_keys=True))
     else:
         print(db.read())
 
@@ -127,6 +454,10 @@ else:
 Choose one of the following commands:
     r            ::  read a random fortune from the database,
     w <FORTUNE>  ::  write a new fortune into the database,
+    m <N>        ::  read N random fortunes from the database,
+    l <FILE>     ::  write all the fortunes of FILE into the database,
+    s <TERM>     ::  print the fortunes containing all the words of TERM,
+    f <TERM>     ::  read a random fortune containing the words of TERM,
     h            ::  print this menu,
     q            ::  exit.\
 """)
@@ -141,6 +472,21 @@ Choose one of the following commands:
         elif (len(command) > 1 and command[0] == "w" and
                 command[1] in [" ", "\t"]):
             db.write(command[2:].strip())
+        elif (len(command) > 1 and command[0] == "m" and
+                command[1] in [" ", "\t"]):
+            for fortune in db.read_many(int(command[2:].strip())):
+                print(fortune)
+        elif (len(command) > 1 and command[0] == "l" and
+                command[1] in [" ", "\t"]):
+            n = load(db, command[2:].strip(), opts.batch_size)
+            print("Wrote {} fortunes.".format(n))
+        elif (len(command) > 1 and command[0] == "s" and
+                command[1] in [" ", "\t"]):
+            for fortune in db.search(command[2:].strip(), opts.limit):
+                print(fortune)
+        elif (len(command) > 1 and command[0] == "f" and
+                command[1] in [" ", "\t"]):
+            print(db.random_matching(command[2:].strip()))
         elif command == "h":
             menu()
         elif (len(command) > 1 and command[0] == "c" and
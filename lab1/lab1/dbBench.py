@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Benchmark of the storage engines of the fortune database.
+
+A synthetic fortune file is created (or an existing one is copied) in a
+temporary directory, converted for the engines that need a file format
+of their own, and each engine opens it in a process of its own, so that
+the resident memory of one does not hide the one of the next. For each
+engine the benchmark reports the time needed to open the file, the
+resident memory it costs, the latency of read() and the latency of
+write().
+
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+
+sys.path.append("../modules")
+from Server.database import Database
+from Server.Storage import blockStore
+from Server.Storage import logStore
+from Server.Storage import sqliteStore
+
+# -----------------------------------------------------------------------------
+# Initialize and read the command line arguments
+# -----------------------------------------------------------------------------
+
+description = """\
+Benchmark of the memory used and of the read() and write() latency of the
+database storage engines.\
+"""
+parser = argparse.ArgumentParser(description=description)
+parser.add_argument(
+    "-n", "--records", metavar="N", dest="records", type=int,
+    default=10000000,
+    help="Number of records of the synthetic file. Default: 10000000."
+)
+parser.add_argument(
+    "-l", "--length", metavar="BYTES", dest="length", type=int, default=60,
+    help="Average length of a synthetic record. Default: 60."
+)
+parser.add_argument(
+    "-f", "--file", metavar="FILE", dest="file",
+    help="Use this fortune file instead of a synthetic one."
+)
+parser.add_argument(
+    "-r", "--reads", metavar="N", dest="reads", type=int, default=100000,
+    help="Number of reads timed for each engine. Default: 100000."
+)
+parser.add_argument(
+    "-w", "--writes", metavar="N", dest="writes", type=int, default=1000,
+    help="Number of writes timed for each engine. Default: 1000."
+)
+parser.add_argument(
+    "-d", "--durability", metavar="DURABILITY", dest="durability",
+    default="flush", choices=["buffered", "flush", "fsync"],
+    help="Durability of the timed writes. Default: flush."
+)
+parser.add_argument(
+    "-e", "--engines", "-s", "--storages", metavar="ENGINE", dest="engines",
+    nargs="+", default=["memory", "array", "mmap", "block", "log", "sqlite"],
+    help="Engines to compare. Default: memory array mmap block log sqlite."
+)
+opts = parser.parse_args()
+
+# -----------------------------------------------------------------------------
+# Auxiliary functions
+# -----------------------------------------------------------------------------
+
+WORDS = ("the", "a", "fortune", "of", "cookie", "never", "always", "is",
+         "when", "you", "computer", "bug", "feature", "large", "values",
+         "Murphy", "law", "and", "time", "--", "Anonymous")
+
+
+def generate(path, records, length):
+    """Write a synthetic fortune file."""
+    rand = random.Random(0)
+    with open(path, 'w') as f:
+        batch = []
+        for i in range(records):
+            words = []
+            size = rand.randint(length // 2, length * 3 // 2)
+            while sum(map(len, words)) + len(words) < size:
+                words.append(rand.choice(WORDS))
+            batch.append(" ".join(words) + "\n%\n")
+            if len(batch) == 10000:
+                f.write("".join(batch))
+                batch = []
+        f.write("".join(batch))
+
+
+def rss():
+    """Return the resident memory of this process, in bytes."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def percentile(values, p):
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+def engine_file(engine, path):
+    """Return the file of the database in the format of the engine."""
+    if engine == "block":
+        return path + ".blk"
+    if engine == "log":
+        return path + ".log"
+    if engine == "sqlite":
+        return path + ".sqlite"
+    return path
+
+
+def timed(function, n):
+    """Call function n times and return the sorted latencies."""
+    latencies = []
+    for i in range(n):
+        start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies
+
+
+def measure(engine, path, reads, writes, durability, results):
+    """Open the database with the given engine and time its accesses."""
+    path = engine_file(engine, path)
+    idx_file = path + ".idx"
+    if os.path.exists(idx_file):
+        os.remove(idx_file)
+    before = rss()
+    start = time.perf_counter()
+    db = Database(path, engine, durability)
+    open_time = time.perf_counter() - start
+    loaded = rss()
+    read_latencies = timed(db.read, reads)
+    after_reads = rss()
+    write_latencies = timed(lambda: db.write("A benchmark fortune."), writes)
+    results.put({
+        "engine": engine,
+        "open_s": open_time,
+        "rss_mb": (loaded - before) / 2.0 ** 20,
+        "rss_after_reads_mb": (after_reads - before) / 2.0 ** 20,
+        "read_mean_us": sum(read_latencies) / len(read_latencies) * 1e6,
+        "read_p50_us": percentile(read_latencies, 0.50) * 1e6,
+        "read_p99_us": percentile(read_latencies, 0.99) * 1e6,
+        "write_p50_us": percentile(write_latencies, 0.50) * 1e6,
+        "write_p99_us": percentile(write_latencies, 0.99) * 1e6
+    })
+    db.close()
+
+# -----------------------------------------------------------------------------
+# The main program
+# -----------------------------------------------------------------------------
+
+tmp_dir = tempfile.mkdtemp()
+db_file = os.path.join(tmp_dir, "fortune.db")
+if opts.file is None:
+    print("Generating {} records in {}...".format(opts.records, db_file))
+    generate(db_file, opts.records, opts.length)
+else:
+    # The timed writes go to a copy.
+    shutil.copy(opts.file, db_file)
+print("File size: {:.1f} MB".format(os.path.getsize(db_file) / 2.0 ** 20))
+if "block" in opts.engines:
+    blockStore.convert_to_blocks(db_file, engine_file("block", db_file))
+if "log" in opts.engines:
+    logStore.convert_to_log(db_file, engine_file("log", db_file))
+if "sqlite" in opts.engines:
+    sqliteStore.convert_to_sqlite(db_file, engine_file("sqlite", db_file))
+for engine in ("block", "log", "sqlite"):
+    if engine in opts.engines:
+        print("{} file size: {:.1f} MB".format(engine, os.path.getsize(
+            engine_file(engine, db_file)) / 2.0 ** 20))
+
+print("{:<8} {:>9} {:>9} {:>11} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+    "engine", "open (s)", "RSS (MB)", "+reads (MB)", "mean (us)",
+    "p50 (us)", "p99 (us)", "w p50 (us)", "w p99 (us)"))
+for engine in opts.engines:
+    # Every engine starts from the same file.
+    text_copy = db_file + ".orig"
+    if engine in ("memory", "array", "mmap"):
+        shutil.copy(db_file, text_copy)
+    results = multiprocessing.Queue()
+    p = multiprocessing.Process(target=measure,
+                                args=(engine, db_file, opts.reads,
+                                      opts.writes, opts.durability, results))
+    p.start()
+    p.join()
+    if os.path.exists(text_copy):
+        os.replace(text_copy, db_file)
+    if results.empty():
+        print("{:<8} failed".format(engine))
+        continue
+    r = results.get()
+    print("{engine:<8} {open_s:>9.2f} {rss_mb:>9.1f} "
+          "{rss_after_reads_mb:>11.1f} {read_mean_us:>10.2f} "
+          "{read_p50_us:>10.2f} {read_p99_us:>10.2f} "
+          "{write_p50_us:>10.2f} {write_p99_us:>10.2f}".format(**r))
+
+shutil.rmtree(tmp_dir)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Converter between the fortune file formats."""
+
+import os
+import argparse
+
+import sys
+sys.path.append("../modules")
+from Server.Storage import blockStore
+from Server.Storage import logStore
+from Server.Storage import sqliteStore
+
+# -----------------------------------------------------------------------------
+# Initialize and read the command line arguments
+# -----------------------------------------------------------------------------
+
+description = """\
+Convert a '%'-separated fortune file into the block-compressed format used
+by the 'block' engine, the checksummed record log used by the 'log' engine
+or the SQLite database used by the 'sqlite' engine, or back.\
+"""
+parser = argparse.ArgumentParser(description=description)
+parser.add_argument(
+    "format", choices=["block", "log", "sqlite", "text"],
+    help="Format to convert to."
+)
+parser.add_argument(
+    "source", metavar="SOURCE",
+    help="File to convert."
+)
+parser.add_argument(
+    "destination", metavar="DESTINATION",
+    help="File to write. It is overwritten if it exists."
+)
+parser.add_argument(
+    "-b", "--block-size", metavar="BYTES", dest="block_size", type=int,
+    default=blockStore.BLOCK_SIZE,
+    help="Uncompressed size of the blocks. Default: {}."
+         .format(blockStore.BLOCK_SIZE)
+)
+opts = parser.parse_args()
+
+# -----------------------------------------------------------------------------
+# The main program
+# -----------------------------------------------------------------------------
+
+if opts.format == "block":
+    n = blockStore.convert_to_blocks(opts.source, opts.destination,
+                                     opts.block_size)
+elif opts.format == "log":
+    n = logStore.convert_to_log(opts.source, opts.destination)
+elif opts.format == "sqlite":
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(opts.destination + suffix):
+            os.remove(opts.destination + suffix)
+    n = sqliteStore.convert_to_sqlite(opts.source, opts.destination)
+else:
+    with open(opts.source, 'rb') as f:
+        magic = f.read(len(sqliteStore.SQLITE_MAGIC))
+    if magic == sqliteStore.SQLITE_MAGIC:
+        n = sqliteStore.convert_from_sqlite(opts.source, opts.destination)
+    elif magic.startswith(logStore.MAGIC):
+        n = logStore.convert_from_log(opts.source, opts.destination)
+    else:
+        n = blockStore.convert_from_blocks(opts.source, opts.destination)
+print("Converted {} fortunes.".format(n))
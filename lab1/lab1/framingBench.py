@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Benchmark of the JSON lines against the binary frames.
+
+Typical messages of the server (a request, the answer to a read and the
+answer to a read_many, with fortunes of the database) are encoded and
+decoded over and over, once as JSON lines and once as binary frames (see
+the framing module); the stream of messages is then read back from a
+buffer, line by line or frame by frame, and decoded. The benchmark
+reports the mean time per message of each step.
+
+"""
+
+import io
+import json
+import time
+import random
+import argparse
+
+import sys
+sys.path.append("../modules")
+from Common import framing
+
+# -----------------------------------------------------------------------------
+# Initialize and read the command line arguments
+# -----------------------------------------------------------------------------
+
+description = """\
+Benchmark of the encoding, decoding and reading of JSON lines and binary
+frames.\
+"""
+parser = argparse.ArgumentParser(description=description)
+parser.add_argument(
+    "-f", "--file", metavar="FILE", dest="file", default="dbs/fortune.db",
+    help="Fortune file the messages are made of. Default: dbs/fortune.db."
+)
+parser.add_argument(
+    "-n", "--messages", metavar="N", dest="messages", type=int,
+    default=20000, help="Number of messages per measure. Default: 20000."
+)
+parser.add_argument(
+    "-m", "--read-many", metavar="N", dest="read_many", type=int,
+    default=10, help="Number of fortunes of a read_many answer. "
+                     "Default: 10."
+)
+opts = parser.parse_args()
+
+# -----------------------------------------------------------------------------
+# The benchmark
+# -----------------------------------------------------------------------------
+
+
+def read_fortunes(path):
+    """Return the fortunes of a '%'-separated fortune file."""
+    with open(path, 'r') as f:
+        text = f.read()
+    fortunes = [fortune.strip("\n") for fortune in text.split("\n%\n")]
+    return [fortune for fortune in fortunes if fortune.strip() != ""]
+
+
+def json_line(message):
+    return (json.dumps(message) + '\n').encode()
+
+
+def measure(function, items):
+    """Return the mean time of function over items, in microseconds."""
+    start = time.perf_counter()
+    for item in items:
+        function(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def read_line(reader):
+    line = reader.readline()
+    return json.loads(line) if line else None
+
+
+def measure_reads(data, read):
+    """Return the mean time of read over a stream, in microseconds."""
+    reader = io.BufferedReader(io.BytesIO(data))
+    count = 0
+    start = time.perf_counter()
+    while read(reader) is not None:
+        count = count + 1
+    return (time.perf_counter() - start) / count * 1e6
+
+
+fortunes = read_fortunes(opts.file)
+rand = random.Random(0)
+messages = {
+    "request": lambda i: {"method": "read_many", "args": [opts.read_many],
+                          "id": i},
+    "read": lambda i: {"result": rand.choice(fortunes), "id": i},
+    "read_many": lambda i: {"result": rand.sample(fortunes, opts.read_many),
+                            "id": i}
+}
+
+print("{} messages, {} fortunes per read_many; microseconds per message"
+      .format(opts.messages, opts.read_many))
+print("{:<10} {:<7} {:>8} {:>8} {:>8} {:>8}"
+      .format("message", "format", "bytes", "encode", "decode", "read"))
+for name, make in messages.items():
+    items = [make(i) for i in range(opts.messages)]
+    for fmt, encode, decode, read in [
+            ("json", json_line, json.loads, read_line),
+            ("binary", framing.pack,
+             lambda f: framing.decode(f[framing.FRAME_HEADER.size:]),
+             framing.read_frame)]:
+        encoded = [encode(item) for item in items]
+        size = sum(len(e) for e in encoded) / len(encoded)
+        print("{:<10} {:<7} {:>8.0f} {:>8.2f} {:>8.2f} {:>8.2f}".format(
+            name, fmt, size, measure(encode, items),
+            measure(decode, encoded),
+            measure_reads(b''.join(encoded), read)))
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Benchmark of the policies of the readers-writer lock.
+
+A number of threads share a ReadWriteLock (or a StripedReadWriteLock),
+like the threads serving the clients of the server. Most of them are readers, which take the lock
+for reading over and over; the others are writers, which take it for
+writing and then pause, so that writes are a small fraction of the
+accesses, as in the server. The lock is held for a while on each access
+(sleeping, so that the readers overlap as they do in the server, where
+they wait for the network). For each policy the benchmark reports the
+throughput, the fraction of reads, and how long the readers and the
+writers waited for the lock. A writer still waiting when the run ends
+counts with the time it has waited so far, so that a starved writer
+shows up in the results. Each lock is run with each of the given numbers
+of threads; with no writers and no hold time, the benchmark measures the
+cost of the reader bookkeeping alone.
+
+"""
+
+import time
+import random
+import argparse
+import threading
+
+import sys
+sys.path.append("../modules")
+from Server.Lock.readWriteLock import ReadWriteLock
+from Server.Lock.stripedReadWriteLock import StripedReadWriteLock
+
+locks = {
+    "readers": lambda: ReadWriteLock(),
+    "fair": lambda: ReadWriteLock(fair=True),
+    "striped": lambda: StripedReadWriteLock()
+}
+
+# -----------------------------------------------------------------------------
+# Initialize and read the command line arguments
+# -----------------------------------------------------------------------------
+
+description = """\
+Benchmark of the writer and reader wait of the reader-preferring, the
+phase-fair and the striped readers-writer locks.\
+"""
+parser = argparse.ArgumentParser(description=description)
+parser.add_argument(
+    "-t", "--threads", metavar="N", dest="threads", type=int, nargs="+",
+    default=[32],
+    help="Numbers of threads sharing the lock, one run each. Default: 32."
+)
+parser.add_argument(
+    "-l", "--locks", metavar="LOCK", dest="locks", nargs="+",
+    default=["readers", "fair", "striped"], choices=sorted(locks),
+    help="Locks to run: 'readers' (reader-preferring), 'fair' "
+         "(phase-fair) or 'striped'. Default: all of them."
+)
+parser.add_argument(
+    "-w", "--writers", metavar="N", dest="writers", type=int, default=2,
+    help="Number of these threads that write. Default: 2."
+)
+parser.add_argument(
+    "-p", "--pause", metavar="SECONDS", dest="pause", type=float,
+    default=0.001,
+    help="Mean pause of a writer between two writes; the default gives "
+         "about 95%% of reads with the other defaults. Default: 0.001."
+)
+parser.add_argument(
+    "-H", "--hold", metavar="SECONDS", dest="hold", type=float,
+    default=0.001,
+    help="Time the lock is held for each access. Default: 0.001."
+)
+parser.add_argument(
+    "-d", "--duration", metavar="SECONDS", dest="duration", type=float,
+    default=5.0,
+    help="Duration of the run for each policy. Default: 5."
+)
+opts = parser.parse_args()
+
+# -----------------------------------------------------------------------------
+# Auxiliary functions
+# -----------------------------------------------------------------------------
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+def reader(lock, stop, waits, end):
+    # The readers stop by themselves: without a hold time, they may keep
+    # the main thread from waking up to stop them.
+    while not stop.is_set() and time.perf_counter() < end:
+        start = time.perf_counter()
+        lock.read_acquire()
+        waits.append(time.perf_counter() - start)
+        if opts.hold:
+            time.sleep(opts.hold)
+        lock.read_release()
+
+
+def writer(lock, stop, waits, pending):
+    me = threading.current_thread()
+    rand = random.Random(me.name)
+    while not stop.is_set():
+        start = time.perf_counter()
+        pending[me] = start
+        lock.write_acquire()
+        del pending[me]
+        waits.append(time.perf_counter() - start)
+        time.sleep(opts.hold)
+        lock.write_release()
+        stop.wait(rand.uniform(0, 2 * opts.pause))
+
+
+def run(name, count):
+    """Run count threads on a lock and return the waits observed."""
+    lock = locks[name]()
+    stop = threading.Event()
+    read_waits = []
+    write_waits = []
+    pending = {}
+    end = time.perf_counter() + opts.duration
+    threads = [threading.Thread(target=writer,
+                                args=(lock, stop, write_waits, pending))
+               for i in range(opts.writers)]
+    threads += [threading.Thread(target=reader,
+                                 args=(lock, stop, read_waits, end))
+                for i in range(max(count - opts.writers, 0))]
+    for t in threads:
+        t.daemon = True
+        t.start()
+    time.sleep(opts.duration)
+    end = time.perf_counter()
+    # Writers still waiting at the end of the run.
+    starved = [end - start for start in list(pending.values())]
+    stop.set()
+    for t in threads:
+        t.join(opts.hold * 10 + 0.1)
+    return read_waits, write_waits + starved, len(starved)
+
+# -----------------------------------------------------------------------------
+# The main program
+# -----------------------------------------------------------------------------
+
+print("{} writers, lock held {:.1f} ms, {:.0f} s per run"
+      .format(opts.writers, opts.hold * 1000, opts.duration))
+print("{:<8} {:>7} {:>9} {:>6} {:>8} {:>11} {:>11} {:>11} {:>11} {:>8}"
+      .format("policy", "threads", "reads/s", "reads", "writes",
+              "r p99 (ms)", "w p50 (ms)", "w p99 (ms)", "w max (ms)",
+              "pending"))
+for count in opts.threads:
+    for name in opts.locks:
+        reads, writes, starved = run(name, count)
+        reads.sort()
+        writes.sort()
+        done = len(writes) - starved
+        print("{:<8} {:>7} {:>9.0f} {:>6.1%} {:>8} {:>11.2f} {:>11.2f} "
+              "{:>11.2f} {:>11.2f} {:>8}".format(
+                  name, count, len(reads) / opts.duration,
+                  len(reads) / max(len(reads) + done, 1), done,
+                  percentile(reads, 0.99) * 1000,
+                  percentile(writes, 0.50) * 1000,
+                  percentile(writes, 0.99) * 1000,
+                  (writes[-1] if writes else 0.0) * 1000, starved))
@@ -11,16 +11,29 @@
 
 """Server that serves clients trying to work with the database."""
 
-import threading
+import os
 import socket
 import json
+import signal
+import threading
+import time
+import selectors
+import asyncio
+import concurrent.futures
 import random
 import argparse
+import traceback
 
 import sys
 sys.path.append("../modules")
 from Server.database import Database
 from Server.Lock.readWriteLock import ReadWriteLock
+from Server.Lock.stripedReadWriteLock import StripedReadWriteLock
+from Server.Lock.processReadWriteLock import ProcessReadWriteLock
+from Server.workerPool import WorkerPool
+from Server.responseCache import ResponseCache
+from Server.admissionControl import AdmissionControl
+from Common import framing
 
 # -----------------------------------------------------------------------------
 # Initialize and read the command line arguments
@@ -28,6 +41,15 @@ from Server.Lock.readWriteLock import ReadWriteLock
 
 rand = random.Random()
 rand.seed()
+
+
+def positive(value):
+    n = int(value)
+    if n < 1:
+        msg = "{} is not a positive number.".format(value)
+        raise argparse.ArgumentTypeError(msg)
+    return n
+
 description = """\
 Server for a fortune database. It allows clients to access the database in
 parallel.\
@@ -43,23 +65,227 @@ parser.add_argument(
     "-f", "--file", metavar="FILE", dest="file", default="dbs/fortune.db",
     help="Set the database file. Default: dbs/fortune.db."
 )
+parser.add_argument(
+    "-e", "--engine", "-s", "--storage", metavar="ENGINE", dest="engine",
+    choices=["memory", "array", "mmap", "block", "log", "sqlite"],
+    help="Set the storage engine of the database: 'memory' loads the "
+         "whole file as a list of strings, 'array' packs it in a single "
+         "buffer, 'mmap' maps it and indexes the record offsets, 'block' "
+         "reads a block-compressed file, 'log' a checksummed record log "
+         "and 'sqlite' an SQLite database (see dbConvert.py). "
+         "Default: memory, or mmap with --workers."
+)
+parser.add_argument(
+    "-d", "--durability", metavar="DURABILITY", dest="durability",
+    default="flush", choices=["buffered", "flush", "fsync"],
+    help="Set when a write is considered done: 'buffered' once it is in "
+         "the file buffer, 'flush' once it is handed to the OS, 'fsync' "
+         "once it is on the disk. Default: flush."
+)
+parser.add_argument(
+    "-S", "--search-index", action="store_true", dest="search_index",
+    default=False,
+    help="Index the words of the fortunes to answer search requests."
+)
+parser.add_argument(
+    "-F", "--follow", action="store_true", dest="follow", default=False,
+    help="Watch the database file and serve the fortunes appended to it "
+         "by other programs without a restart."
+)
+parser.add_argument(
+    "--fair-lock", action="store_true", dest="fair_lock", default=False,
+    help="Use a phase-fair readers-writer lock, so that writers are not "
+         "starved by a steady flow of readers."
+)
+parser.add_argument(
+    "--striped-lock", action="store_true", dest="striped_lock",
+    default=False,
+    help="Count the readers of the readers-writer lock on several "
+         "stripes, so that they do not all contend for a single mutex. "
+         "Ignored with --fair-lock."
+)
+parser.add_argument(
+    "--process-lock", action="store_true", dest="process_lock",
+    default=False,
+    help="Also lock the database against the other server processes "
+         "of the host started with this option on the same file, "
+         "through FILE.lock, and load the fortunes they write. Reads "
+         "with --snapshots skip the lock: add --follow for them."
+)
+parser.add_argument(
+    "--snapshots", action="store_true", dest="snapshots", default=False,
+    help="Serve reads from the snapshot published by the last write, "
+         "without taking the readers-writer lock."
+)
+parser.add_argument(
+    "--lock-stats", action="store_true", dest="lock_stats", default=False,
+    help="Record the wait and hold times of the readers-writer lock, "
+         "returned by the stats request."
+)
+parser.add_argument(
+    "--lock-timeout", metavar="SECONDS", dest="lock_timeout", type=float,
+    default=1.0,
+    help="Answer a request with a BusyError if the readers-writer lock "
+         "is not acquired within this time; a negative value waits for "
+         "ever. Default: 1."
+)
+parser.add_argument(
+    "-t", "--threads", metavar="N", dest="threads", type=int, default=32,
+    help="Number of worker threads serving the requests. Default: 32."
+)
+parser.add_argument(
+    "-q", "--queue-depth", metavar="N", dest="queue_depth", type=positive,
+    default=128,
+    help="Number of requests that may wait for a worker, at least 1; "
+         "the next ones are answered with a BusyError. Default: 128."
+)
+parser.add_argument(
+    "--async", action="store_true", dest="use_async", default=False,
+    help="Serve the connections from a single asyncio event loop, "
+         "which waits for any number of idle clients without a thread "
+         "each; the requests that may block run on --threads threads, "
+         "at most --queue-depth of them waiting for one."
+)
+parser.add_argument(
+    "-i", "--idle-timeout", metavar="SECONDS", dest="idle_timeout",
+    type=float, default=10.0,
+    help="Close a connection after this long without a request; a "
+         "negative value keeps it open for ever. Default: 10."
+)
+parser.add_argument(
+    "-c", "--response-cache", metavar="MB", dest="response_cache",
+    type=float, default=16.0,
+    help="Memory budget of the cache of fortunes encoded for the "
+         "responses to the reads; 0 disables it. Default: 16."
+)
+parser.add_argument(
+    "-m", "--max-in-flight", metavar="N", dest="max_in_flight", type=int,
+    default=0,
+    help="Number of requests the server works on at once; the next ones "
+         "are answered at once with a busy error, which the clients "
+         "retry later. 0 sets no bound besides the threads. Default: 0."
+)
+parser.add_argument(
+    "-W", "--workers", metavar="N", dest="workers", type=int, default=1,
+    help="Number of server processes accepting on the port (with "
+         "SO_REUSEPORT), so that the requests are served on several "
+         "cores. Implies --process-lock, so that each process loads the "
+         "fortunes written by the others. Default: 1."
+)
 opts = parser.parse_args()
 
 db_file = opts.file
+engine = opts.engine or ("mmap" if opts.workers > 1 else "memory")
+process_lock = opts.process_lock or opts.workers > 1
 server_address = ("", opts.port)
+idle_timeout = opts.idle_timeout if opts.idle_timeout >= 0 else None
+
+# Errors answered to the requests turned away by an overloaded server,
+# and to the requests whose deadline has passed. The code tells the
+# clients that the request was not processed and may be retried.
+OVERLOADED = {"name": "BusyError", "code": "busy",
+              "args": ["The server is overloaded, try again later."]}
+DEADLINE_EXCEEDED = {"name": "DeadlineExceeded", "code": "deadline_exceeded",
+                     "args": ["The deadline of the request has passed."]}
+# Error answered to a JSON line longer than the async server reads.
+TOO_LONG = {"name": "ValueError",
+            "args": ["Request of more than {} bytes refused."
+                     .format(framing.MAX_FRAME)]}
+
+# Requests answered even by an overloaded server.
+UNCOUNTED = {"stats", framing.NEGOTIATE}
 
 # -----------------------------------------------------------------------------
 # Auxiliary classes
 # -----------------------------------------------------------------------------
 
 
+class LineTooLong(Exception):
+
+    """A JSON line was longer than the server reads.
+
+    req holds the id of the request, if it could be found in the line.
+
+    """
+
+    def __init__(self, req):
+        Exception.__init__(self)
+        self.req = req
+
+
+def find_id(data, last=True):
+    """Return {"id": id} for an "id" key in a piece of a JSON line.
+
+    Return {} if there is none, or if its value is cut off.
+
+    """
+    pos = data.rfind(b'"id":') if last else data.find(b'"id":')
+    if pos < 0:
+        return {}
+    text = data[pos + len(b'"id":'):].decode(errors="replace").lstrip()
+    try:
+        return {"id": json.JSONDecoder().raw_decode(text)[0]}
+    except ValueError:
+        return {}
+
+
+class BusyError(Exception):
+
+    """The database lock could not be acquired in time."""
+
+    code = "busy"
+
+
 class Server(object):
 
-    """Class that provides synchronous access to the database."""
+    """Class that provides synchronous access to the database.
+
+    A request waits at most lock_timeout seconds for the readers-writer
+    lock (for ever if it is negative), and then fails with a BusyError
+    instead of piling up behind the lock. At most max_in_flight
+    requests are processed at once, see AdmissionControl.
+
+    """
+
+    def __init__(self, db_file, engine="memory", durability="flush",
+                 search_index=False, follow=False, fair_lock=False,
+                 snapshots=False, lock_stats=False, lock_timeout=-1,
+                 striped_lock=False, process_lock=False, cache_budget=0,
+                 max_in_flight=0):
+        self.db = Database(db_file, engine, durability, search_index,
+                           follow, snapshots=snapshots)
+        if process_lock:
+            self.rwlock = ProcessReadWriteLock(db_file + ".lock",
+                                               self.db.refresh, fair_lock,
+                                               lock_stats)
+        elif striped_lock:
+            self.rwlock = StripedReadWriteLock(fair_lock, lock_stats)
+        else:
+            self.rwlock = ReadWriteLock(fair_lock, lock_stats)
+        self.lock_timeout = lock_timeout
+        self.admission = AdmissionControl(max_in_flight)
+        self.pool = None
+        self.cache = None
+        if cache_budget > 0:
+            self.cache = ResponseCache(cache_budget)
+
+    # Private methods
 
-    def __init__(self, db_file):
-        self.db = Database(db_file)
-        self.rwlock = ReadWriteLock()
+    def _read_acquire(self):
+        if not self.rwlock.read_acquire(timeout=self.lock_timeout):
+            raise BusyError("The database is busy, try again later.")
+
+    def _write(self, ticket):
+        """Commit ticket under the lock, or withdraw it if busy."""
+        if not self.rwlock.write_acquire(timeout=self.lock_timeout):
+            if self.db.cancel(ticket):
+                raise BusyError("The database is busy, try again later.")
+            # Another writer committed the ticket in the meantime.
+            return
+        try:
+            self.db.commit(ticket)
+        finally:
+            self.rwlock.write_release()
 
     # Public methods
 
@@ -67,9 +293,10 @@ class Server(object):
         #
         # Your code here.
         #
-
+        if self.db.snapshots:
+            return self.db.read()
+        self._read_acquire()
         try:
-            self.rwlock.read_acquire()
             return self.db.read()
         finally:
             self.rwlock.read_release()
@@ -80,27 +307,89 @@ class Server(object):
         #
         # Your code here.
         #
+        # Queue the fortune before waiting for the lock: whoever gets
+        # the lock first writes all the queued fortunes at once.
+        self._write(self.db.enqueue(fortune))
+
+        #end my code
+
+    def _encoded(self, n):
+        indexes = [self.db.random_index() for i in range(n)]
+        # An empty database reads as an empty fortune.
+        return [b'""' if index is None else self.cache.get(index, self.db.get)
+                for index in indexes]
+
+    def read_encoded(self, n):
+        """Read n random fortunes, JSON-encoded by the ResponseCache."""
+        if self.db.snapshots:
+            return self._encoded(n)
+        self._read_acquire()
         try:
-            self.rwlock.write_acquire()
-            self.db.write(fortune)
+            return self._encoded(n)
         finally:
-            self.rwlock.write_release()
+            self.rwlock.read_release()
 
-        #end my code
+    def read_many(self, n):
+        """Read n random fortunes under a single lock acquisition."""
+        if self.db.snapshots:
+            return self.db.read_many(n)
+        self._read_acquire()
+        try:
+            return self.db.read_many(n)
+        finally:
+            self.rwlock.read_release()
 
+    def search(self, term, limit=10):
+        """Return at most limit fortunes containing all words of term."""
+        self._read_acquire()
+        try:
+            return self.db.search(term, limit)
+        finally:
+            self.rwlock.read_release()
 
-class Request(threading.Thread):
+    def random_matching(self, term):
+        """Return a random fortune containing all words of term."""
+        self._read_acquire()
+        try:
+            return self.db.random_matching(term)
+        finally:
+            self.rwlock.read_release()
+
+    def write_many(self, fortunes):
+        """Write several fortunes under a single lock acquisition."""
+        self._write(self.db.enqueue_many(fortunes))
+
+    def stats(self):
+        """Return statistics about the database and its lock."""
+        stats = self.db.stats()
+        stats["pid"] = os.getpid()
+        stats["lock"] = self.rwlock.stats()
+        stats["admission"] = self.admission.stats()
+        if self.pool is not None:
+            stats["pool"] = self.pool.stats()
+        if self.cache is not None:
+            stats["response_cache"] = self.cache.stats()
+        return stats
+
+
+class Request(object):
 
     """ Class for handling incoming requests.
-        Each request is handled in a separate thread.
+        The requests of a connection are answered by the threads of the
+        WorkerPool, a turn at a time: when data has come, a thread reads
+        it, answers the complete requests and hands the connection back
+        to the ThreadedServer, which parks it until the next ones come.
     """
 
-    def __init__(self, db_server, conn, addr):
-        threading.Thread.__init__(self)
+    def __init__(self, db_server, conn, addr, parking=None):
         self.db_server = db_server
         self.conn = conn
         self.addr = addr
-        self.daemon = True
+        self.parking = parking
+        # Bytes read from the connection, not yet a complete request.
+        self.buffer = bytearray()
+        # Framing of the connection, see the framing module.
+        self.framing = "json"
 
     # Private methods
 
@@ -111,10 +400,20 @@ class Request(threading.Thread):
             The request format is:
                 {
                     "method": called_method_name,
-                    "args": called_method_arguments
+                    "args": called_method_arguments,
+                    "id": optional_request_id,
+                    "deadline": optional_time_limit
                 }
 
-            The returned result is a JSON of the following format:
+            The result carries the id of the request, if it has one, so
+            that a client may send several requests without waiting for
+            their results. A request whose deadline (a time.time()
+            value) has passed, or that comes while the server is
+            overloaded, is answered with an error without being
+            processed.
+
+            The returned result is a line of JSON, encoded in UTF-8, of
+            the following format:
                 -- in case of no error:
                     {
                         "result": called_method_result
@@ -123,7 +422,8 @@ class Request(threading.Thread):
                     {
                         "error": {
                             "name": error_class_name,
-                            "args": error_arguments
+                            "args": error_arguments,
+                            "code": optional_error_code
                         }
                     }
         """
@@ -131,40 +431,428 @@ class Request(threading.Thread):
         # Your code here.
         #
 
-        req = json.loads(request)
+        return self.respond(json.loads(request))
+
+        #end my code
+
+    def respond(self, req):
+        """Answer a decoded request, if it is admitted; return the result.
+
+        The requests are admitted by the AdmissionControl of the server,
+        except for the few that it answers even when overloaded.
 
-        try: 
+        """
+        if req.get("method") in UNCOUNTED:
+            return self.call(req)
+        admission = self.db_server.admission
+        if admission.expired(req.get("deadline")):
+            return self.encode(req, {"error": DEADLINE_EXCEEDED})
+        if not admission.enter():
+            return self.encode(req, {"error": OVERLOADED})
+        try:
+            return self.call(req)
+        finally:
+            admission.leave()
+
+    def call(self, req):
+        """Call the method of a decoded request; return the JSON result.
+
+        The reads are answered from the ResponseCache of the server, if
+        it has one: the result is spliced from the encoded fortunes. A
+        _negotiate request switches the connection to binary frames,
+        once answered, if the client offers them.
+
+        """
+        try:
+            method = req.get("method")
+            if method == framing.NEGOTIATE:
+                # The answer itself is still a JSON line.
+                chosen = framing.negotiate(req["args"])
+                result = self.encode(req, {"result": chosen})
+                self.framing = chosen
+                return result
+            if self.db_server.cache is not None and self.framing == "json":
+                if method == "read" and not req["args"]:
+                    return self.encode_result(
+                        req, self.db_server.read_encoded(1)[0])
+                if method == "read_many":
+                    return self.encode_result(req, b'[' + b', '.join(
+                        self.db_server.read_encoded(*req["args"])) + b']')
             #find the function the client wants and return its result
             str_method = req['method']
             req_method = getattr(self.db_server, str_method)
             args = req["args"]
             result = req_method(*args)
-            return json.dumps({"result":result})
+            response = {"result": result}
         except Exception as e: 
             #catch any exception and build a json of it to send back to the client
-            return json.dumps({"error": {"name": type(e).__name__, "args":e.args}})
+            response = {"error": {"name": type(e).__name__, "args": e.args}}
+            if hasattr(e, "code"):
+                response["error"]["code"] = e.code
+        return self.encode(req, response)
+
+    def encode(self, req, response):
+        """Return the JSON line, or the frame, of a response to req."""
+        if "id" in req:
+            response["id"] = req["id"]
+        if self.framing == framing.BINARY:
+            return framing.pack(response)
+        return (json.dumps(response) + '\n').encode()
+
+    def encode_result(self, req, result):
+        """Return the JSON line of an already encoded result."""
+        if "id" in req:
+            return (b'{"result": ' + result + b', "id": ' +
+                    json.dumps(req["id"]).encode() + b'}\n')
+        return b'{"result": ' + result + b'}\n'
+
+    def _receive(self):
+        """Read the data that has come; return False at the end."""
+        data = self.conn.recv(65536)
+        self.buffer += data
+        return len(data) > 0
+
+    def _take_line(self):
+        """Remove the next complete JSON line from the buffer."""
+        end = self.buffer.find(b'\n')
+        if end < 0:
+            return None
+        line = bytes(self.buffer[:end + 1])
+        del self.buffer[:end + 1]
+        return line
+
+    def _take_frame(self):
+        """Remove the next complete frame from the buffer; decode it."""
+        size = framing.FRAME_HEADER.size
+        if len(self.buffer) < size:
+            return None
+        length = framing.FRAME_HEADER.unpack_from(self.buffer)[0]
+        if length > framing.MAX_FRAME:
+            raise framing.FramingError(
+                "Frame of {} bytes refused.".format(length))
+        if len(self.buffer) < size + length:
+            return None
+        payload = bytes(self.buffer[size:size + length])
+        del self.buffer[:size + length]
+        return framing.decode(payload)
+
+    def _answer(self, busy=False):
+        """Answer the complete requests in the buffer; return the results.
+
+        When busy, the requests are answered with a BusyError instead,
+        except for the few that even an overloaded server answers.
 
-
-        #end my code
+        """
+        results = []
+        while True:
+            if self.framing == framing.BINARY:
+                req = self._take_frame()
+                if req is None:
+                    break
+            else:
+                line = self._take_line()
+                if line is None:
+                    break
+                if not busy:
+                    results.append(self.process_request(line))
+                    continue
+                req = json.loads(line)
+            if busy and req.get("method") not in UNCOUNTED:
+                results.append(self.encode(req, {"error": OVERLOADED}))
+            else:
+                results.append(self.respond(req))
+        return results
 
     def run(self):
+        """Answer the requests that have come, then park the connection."""
         try:
-            # Threat the socket as a file stream.
-            worker = self.conn.makefile(mode="rw")
-            # Read the request in a serialized form (JSON).
-            request = worker.readline()
-            # Process the request.
-            result = self.process_request(request)
-            # Send the result.
-            worker.write(result + '\n')
-            worker.flush()
+            if not self._receive():
+                self.conn.close()
+                return
+            # Send the results, they are already encoded.
+            self.conn.sendall(b''.join(self._answer()))
         except Exception as e:
             # Catch all errors in order to prevent the object from crashing
             # due to bad connections coming from outside.
             print("The connection to the caller has died:")
             print("\t{}: {}".format(type(e), e))
-        finally:
             self.conn.close()
+            return
+        self.parking.park(self)
+
+    def reject(self):
+        """Answer with a BusyError without processing the requests."""
+        timeout = self.conn.gettimeout()
+        try:
+            # Called from the accept loop, which must not wait for a
+            # slow client.
+            self.conn.settimeout(0.01)
+            if not self._receive():
+                self.conn.close()
+                return
+            self.conn.sendall(b''.join(self._answer(busy=True)))
+        except Exception:
+            self.conn.close()
+            return
+        self.conn.settimeout(timeout)
+        self.parking.park(self)
+
+
+class ThreadedServer(object):
+
+    """Serves the clients from the threads of a WorkerPool.
+
+    A thread is taken for a turn of a connection, not for the whole
+    connection: the accept loop waits, in a selector, for new
+    connections and for data on the idle ones at once, and submits a
+    Request.run() to the pool when data has come. Once the requests
+    are answered, the connection is parked in the selector again, so
+    idle clients hold no thread. When the queue of the pool is full,
+    the requests are answered with a BusyError by the loop itself. A
+    connection parked for idle_timeout seconds is closed.
+
+    """
+
+    def __init__(self, db_server, pool, idle_timeout=None):
+        self.db_server = db_server
+        self.pool = pool
+        self.idle_timeout = idle_timeout
+        self.selector = selectors.DefaultSelector()
+        # Connections handed back by the threads, and a socket pair on
+        # which they wake the loop up.
+        self.lock = threading.Lock()
+        self.returned = []
+        self.wakeup, self.waker = socket.socketpair()
+        self.waker.setblocking(False)
+
+    # Private methods
+
+    def _accept(self, sock):
+        try:
+            conn, addr = sock.accept()
+        except socket.error:
+            return
+        print("Serving a request from {0}".format(addr))
+        conn.settimeout(self.idle_timeout)
+        self._register(Request(self.db_server, conn, addr, self))
+
+    def _register(self, request):
+        request.parked = time.monotonic()
+        self.selector.register(request.conn, selectors.EVENT_READ, request)
+
+    def _unpark(self):
+        """Register the connections handed back by the threads."""
+        try:
+            while self.wakeup.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+        self.lock.acquire()
+        try:
+            returned, self.returned = self.returned, []
+        finally:
+            self.lock.release()
+        for request in returned:
+            self._register(request)
+
+    def _close_idle(self):
+        """Close the connections parked for more than idle_timeout."""
+        limit = time.monotonic() - self.idle_timeout
+        for key in list(self.selector.get_map().values()):
+            if isinstance(key.data, Request) and key.data.parked < limit:
+                self.selector.unregister(key.fileobj)
+                key.fileobj.close()
+
+    # Public methods
+
+    def park(self, request):
+        """Hand a connection back to the loop, from a thread of the pool."""
+        self.lock.acquire()
+        try:
+            self.returned.append(request)
+        finally:
+            self.lock.release()
+        try:
+            self.waker.send(b'\0')
+        except BlockingIOError:
+            # The loop has yet to read the earlier wake ups.
+            pass
+
+    def serve(self, sock):
+        """Serve the connections of a listening socket for ever."""
+        self.wakeup.setblocking(False)
+        self.selector.register(sock, selectors.EVENT_READ)
+        self.selector.register(self.wakeup, selectors.EVENT_READ)
+        timeout = None
+        if self.idle_timeout is not None:
+            timeout = min(1.0, self.idle_timeout)
+        swept = time.monotonic()
+        while True:
+            for key, events in self.selector.select(timeout):
+                if key.fileobj is sock:
+                    self._accept(sock)
+                elif key.fileobj is self.wakeup:
+                    self._unpark()
+                else:
+                    request = key.data
+                    self.selector.unregister(request.conn)
+                    if not self.pool.submit(request.run):
+                        request.reject()
+            if timeout is not None and time.monotonic() - swept >= timeout:
+                self._close_idle()
+                swept = time.monotonic()
+
+
+class AsyncServer(object):
+
+    """Serves the clients from an asyncio event loop.
+
+    A connection costs a StreamReader and a StreamWriter instead of a
+    thread, so idle or slow clients are cheap. A request is decoded on
+    the loop and answered by Request.respond(), with the same protocol
+    as the threaded server. The requests of a connection that carry an
+    id are processed concurrently and answered as they complete; the
+    others are answered in turn. The requests that never wait for the lock
+    (stats, and the reads with snapshots) run on the loop; the others,
+    which may wait for the lock or for the disk, run on an executor of
+    threads. At most threads + queue_depth of them may be in progress,
+    the next ones are answered with a BusyError. A JSON line longer
+    than MAX_FRAME is skipped and answered with an error, which carries
+    the id of the request if it can be found; if not, the connection is
+    closed after the error.
+
+    """
+
+    # Bytes of a line too long searched for the id of its request.
+    ID_WINDOW = 256
+
+    def __init__(self, db_server, threads=32, queue_depth=128,
+                 idle_timeout=None):
+        self.db_server = db_server
+        self.idle_timeout = idle_timeout
+        self.executor = concurrent.futures.ThreadPoolExecutor(threads)
+        self.limit = threads + queue_depth
+        self.pending = 0
+        self.inline = {"stats", framing.NEGOTIATE}
+        if db_server.db.snapshots:
+            self.inline.update(("read", "read_many"))
+
+    # Private methods
+
+    async def _answer(self, request, req):
+        loop = asyncio.get_running_loop()
+        if req.get("method") in self.inline:
+            return request.respond(req)
+        # Drop an expired request before it waits for a thread.
+        if self.db_server.admission.expired(req.get("deadline")):
+            return request.encode(req, {"error": DEADLINE_EXCEEDED})
+        if self.pending >= self.limit:
+            return request.encode(req, {"error": OVERLOADED})
+        self.pending = self.pending + 1
+        try:
+            return await loop.run_in_executor(self.executor,
+                                              request.respond, req)
+        finally:
+            self.pending = self.pending - 1
+
+    async def _read_line(self, reader):
+        """Return the next JSON line.
+
+        The rest of a line longer than the limit of the reader is read
+        and dropped, so that the next request is read from its start,
+        and LineTooLong is raised. The id of the request is looked for
+        in the first and the last ID_WINDOW bytes of the line, where
+        the clients put it.
+
+        """
+        try:
+            return await reader.readuntil(b'\n')
+        except asyncio.IncompleteReadError as e:
+            return e.partial
+        except asyncio.LimitOverrunError as e:
+            consumed = e.consumed
+        head = None
+        tail = b''
+        while True:
+            data = await reader.readexactly(consumed)
+            if head is None:
+                head = data[:self.ID_WINDOW]
+            tail = (tail + data[-self.ID_WINDOW:])[-self.ID_WINDOW:]
+            try:
+                data = await reader.readuntil(b'\n')
+            except asyncio.IncompleteReadError as e:
+                data = e.partial
+            except asyncio.LimitOverrunError as e:
+                consumed = e.consumed
+                continue
+            tail = (tail + data)[-self.ID_WINDOW:]
+            raise LineTooLong(find_id(tail) or find_id(head, last=False))
+
+    async def _reply(self, request, req, writer):
+        result = await self._answer(request, req)
+        writer.write(result)
+        await writer.drain()
+
+    async def _serve_client(self, reader, writer):
+        addr = writer.get_extra_info("peername")
+        print("Serving a request from {0}".format(addr))
+        request = Request(self.db_server, None, addr)
+        tasks = set()
+        try:
+            while True:
+                if request.framing == framing.BINARY:
+                    read = framing.read_frame_async(reader)
+                else:
+                    read = self._read_line(reader)
+                try:
+                    req = await asyncio.wait_for(read, self.idle_timeout)
+                except asyncio.TimeoutError:
+                    # Idle for too long.
+                    break
+                except LineTooLong as e:
+                    writer.write(request.encode(e.req, {"error": TOO_LONG}))
+                    await writer.drain()
+                    if "id" not in e.req:
+                        # The client could not tell which request the
+                        # error answers: it must not wait for the others.
+                        break
+                    continue
+                if not req:
+                    break
+                if request.framing != framing.BINARY:
+                    req = json.loads(req)
+                # The framing of the next requests depends on the answer
+                # to a _negotiate request.
+                if "id" not in req or req["method"] == framing.NEGOTIATE:
+                    await self._reply(request, req, writer)
+                    continue
+                task = asyncio.ensure_future(self._reply(request, req, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except Exception as e:
+            print("The connection to the caller has died:")
+            print("\t{}: {}".format(type(e), e))
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _serve(self, sock):
+        server = await asyncio.start_server(self._serve_client, sock=sock,
+                                            limit=framing.MAX_FRAME)
+        async with server:
+            await server.serve_forever()
+
+    # Public methods
+
+    def serve(self, sock):
+        """Serve the connections of a listening socket for ever."""
+        try:
+            asyncio.run(self._serve(sock))
+        finally:
+            self.executor.shutdown(wait=False)
 
 # -----------------------------------------------------------------------------
 # The main program
@@ -174,22 +862,93 @@ print("Listening to: {}:{}".format(socket.gethostname(), opts.port))
 with open("srv_address.tmp", "w") as f:
     f.write("{}:{}\n".format(socket.gethostname(), opts.port))
 
-sync_db = Server(db_file)
 
-server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-server.bind(server_address)
-server.listen(1)
-
-print("Press Ctrl-C to stop the server...")
-
-try:
-    while True:
+def listen():
+    """Return the listening socket of a server process."""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if opts.workers > 1:
+        # Every worker binds a socket of its own to the port; the kernel
+        # spreads the incoming connections among them.
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    server.bind(server_address)
+    server.listen(socket.SOMAXCONN)
+    return server
+
+
+def run():
+    """Open the database and serve the clients until interrupted."""
+    sync_db = Server(db_file, engine, opts.durability, opts.search_index,
+                     opts.follow, opts.fair_lock, opts.snapshots,
+                     opts.lock_stats, opts.lock_timeout, opts.striped_lock,
+                     process_lock, int(opts.response_cache * 2 ** 20),
+                     opts.max_in_flight)
+    server = listen()
+
+    if opts.use_async:
         try:
-            conn, addr = server.accept()
-            req = Request(sync_db, conn, addr)
-            print("Serving a request from {0}".format(addr))
-            req.start()
-        except socket.error:
-            continue
-except KeyboardInterrupt:
-    pass
+            AsyncServer(sync_db, opts.threads, opts.queue_depth,
+                        idle_timeout).serve(server)
+        except KeyboardInterrupt:
+            pass
+    else:
+        pool = WorkerPool(opts.threads, opts.queue_depth)
+        pool.start()
+        sync_db.pool = pool
+        try:
+            ThreadedServer(sync_db, pool, idle_timeout).serve(server)
+        except KeyboardInterrupt:
+            pass
+
+
+if opts.workers > 1:
+    # Fork the workers before any database or thread is opened: each
+    # one opens its own, and they share the file through the page cache.
+    workers = []
+    # The children would print the buffered output again.
+    sys.stdout.flush()
+    for i in range(opts.workers):
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                run()
+            except KeyboardInterrupt:
+                pass
+            except BaseException:
+                traceback.print_exc()
+                status = 1
+            finally:
+                # os._exit() does not flush the buffers of the streams.
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(status)
+        workers.append(pid)
+    print("Started {} workers.".format(len(workers)))
+    print("Press Ctrl-C to stop the server...")
+
+    def wait_workers():
+        """Wait for the workers; return the number of those that failed."""
+        failed = 0
+        while workers:
+            pid, status = os.wait()
+            workers.remove(pid)
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0:
+                print("Worker {} failed with status {}.".format(pid, code))
+                failed = failed + 1
+        return failed
+
+    try:
+        failed = wait_workers()
+    except KeyboardInterrupt:
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGINT)
+            except ProcessLookupError:
+                pass
+        failed = wait_workers()
+    if failed:
+        sys.exit(1)
+else:
+    print("Press Ctrl-C to stop the server...")
+    run()
@@ -0,0 +1,225 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Wait and hold time statistics of a lock."""
+
+import threading
+import time
+import weakref
+
+# Number of buckets of a Histogram; the last one holds everything longer
+# than 2 ** (BUCKETS - 2) microseconds (about 17 minutes).
+BUCKETS = 32
+
+
+class Histogram(object):
+
+    """Histogram of durations with power of two buckets.
+
+    Bucket b counts the durations d, in microseconds, such that
+    2 ** (b - 1) <= d < 2 ** b (bucket 0 holds the durations under one
+    microsecond). Adding a duration costs a few integer operations.
+
+    Public methods:
+        --  add(seconds)
+        --  merge(other)
+        --  stats()
+
+    """
+
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    # Private methods
+
+    def _percentile(self, p):
+        """Return the upper bound of the bucket of percentile p, in ms."""
+        rank = self.count * p
+        seen = 0
+        for b, n in enumerate(self.buckets):
+            seen = seen + n
+            if seen > rank:
+                return min(2 ** b / 1000.0, self.max * 1000)
+        return self.max * 1000
+
+    # Public methods
+
+    def add(self, seconds):
+        b = min(int(seconds * 1e6).bit_length(), BUCKETS - 1)
+        self.buckets[b] = self.buckets[b] + 1
+        self.count = self.count + 1
+        self.total = self.total + seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        """Add the durations counted by another histogram."""
+        for b, n in enumerate(other.buckets):
+            self.buckets[b] = self.buckets[b] + n
+        self.count = self.count + other.count
+        self.total = self.total + other.total
+        if other.max > self.max:
+            self.max = other.max
+
+    def stats(self):
+        """Return the count, mean, percentiles and non-empty buckets."""
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self._percentile(0.50),
+            "p99_ms": self._percentile(0.99),
+            "max_ms": self.max * 1000,
+            "buckets_us": dict(("<{}".format(2 ** b), n)
+                               for b, n in enumerate(self.buckets) if n)
+        }
+
+
+class _Shard(object):
+
+    """Counters of the acquisitions made by a thread."""
+
+    def __init__(self, kinds):
+        self.wait = dict((k, Histogram()) for k in kinds)
+        self.hold = dict((k, Histogram()) for k in kinds)
+        self.contended = dict((k, 0) for k in kinds)
+        self.queued = dict((k, 0) for k in kinds)
+        self.timeouts = dict((k, 0) for k in kinds)
+        # Times at which the thread acquired the locks it holds.
+        self.held = []
+
+    def merge(self, other):
+        for k in self.wait:
+            self.wait[k].merge(other.wait[k])
+            self.hold[k].merge(other.hold[k])
+            self.contended[k] = self.contended[k] + other.contended[k]
+            self.queued[k] = self.queued[k] + other.queued[k]
+            self.timeouts[k] = self.timeouts[k] + other.timeouts[k]
+
+
+class _Holder(object):
+
+    """Holder of the shard of a thread, in its thread-local storage.
+
+    It is collected when the thread exits, and its finalizer then moves
+    the counts of the shard to the retired ones.
+
+    """
+
+    def __init__(self, shard):
+        self.shard = shard
+
+
+def _retire(lock, shards, retired, shard):
+    lock.acquire()
+    try:
+        shards.remove(shard)
+        retired.merge(shard)
+    finally:
+        lock.release()
+
+
+class LockStats(object):
+
+    """Statistics of the acquisitions of a readers-writer lock.
+
+    A lock calls arrive() before waiting for the lock, acquired() once
+    it holds it, or gave_up() if it timed out, and released() when it
+    lets it go. The kinds of access
+    are "read" and "write"; an acquisition is counted as contended if
+    the lock was not free for it when it arrived. Each thread counts in
+    a shard of its own, without any lock, so that the statistics do not
+    serialize the readers of the lock they measure; stats() sums the
+    shards, and those of the threads that have exited.
+
+    Public methods:
+        --  arrive(kind, busy)
+        --  acquired(kind, start)
+        --  gave_up(kind)
+        --  released(kind)
+        --  stats()
+
+    """
+
+    def __init__(self, kinds=("read", "write")):
+        self.kinds = kinds
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.shards = []
+        self.retired = _Shard(kinds)
+
+    # Private methods
+
+    def _shard(self):
+        """Return the shard of the calling thread."""
+        holder = getattr(self.local, "holder", None)
+        if holder is None:
+            shard = _Shard(self.kinds)
+            self.lock.acquire()
+            try:
+                self.shards.append(shard)
+            finally:
+                self.lock.release()
+            holder = _Holder(shard)
+            weakref.finalize(holder, _retire, self.lock, self.shards,
+                             self.retired, shard)
+            self.local.holder = holder
+        return holder.shard
+
+    # Public methods
+
+    def arrive(self, kind, busy):
+        """Count a thread starting to wait; return the current time."""
+        shard = self._shard()
+        shard.queued[kind] = shard.queued[kind] + 1
+        if busy:
+            shard.contended[kind] = shard.contended[kind] + 1
+        return time.perf_counter()
+
+    def acquired(self, kind, start):
+        """Record the wait of a thread that got the lock."""
+        now = time.perf_counter()
+        shard = self._shard()
+        shard.queued[kind] = shard.queued[kind] - 1
+        shard.wait[kind].add(now - start)
+        shard.held.append(now)
+
+    def gave_up(self, kind):
+        """Count a thread that stopped waiting without the lock."""
+        shard = self._shard()
+        shard.queued[kind] = shard.queued[kind] - 1
+        shard.timeouts[kind] = shard.timeouts[kind] + 1
+
+    def released(self, kind):
+        """Record how long the calling thread held the lock."""
+        shard = self._shard()
+        if not shard.held:
+            # Released by another thread than the one that acquired it.
+            return
+        shard.hold[kind].add(time.perf_counter() - shard.held.pop())
+
+    def stats(self):
+        """Return the statistics of each kind of access."""
+        total = _Shard(self.kinds)
+        self.lock.acquire()
+        try:
+            total.merge(self.retired)
+            for shard in self.shards:
+                total.merge(shard)
+        finally:
+            self.lock.release()
+        return dict((k, {
+            "queued": total.queued[k],
+            "contended": total.contended[k],
+            "timeouts": total.timeouts[k],
+            "wait": total.wait[k].stats(),
+            "hold": total.hold[k].stats()
+        }) for k in self.kinds)
@@ -0,0 +1,150 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Readers-writer lock shared by the processes of a host."""
+
+import fcntl
+import os
+import struct
+import threading
+import time
+
+from .readWriteLock import ReadWriteLock, _deadline, _acquire
+
+# Layout of the lock file: the number of writes released so far.
+GENERATION = struct.Struct("<Q")
+
+# Interval between two attempts at a file lock with a timeout.
+RETRY_INTERVAL = 0.001
+
+
+class ProcessReadWriteLock(ReadWriteLock):
+
+    """ReadWriteLock also held against the other processes of the host.
+
+    The threads of a process first take the ReadWriteLock, then the
+    first reader of the process takes a shared flock() of lock_file
+    (the last one releases it) and a writer an exclusive one, so that
+    several server processes can share a database file. The lock file
+    holds the number of writes done under it: when a process takes the
+    file lock and finds that another process has written since it last
+    held it, it calls refresh() (e.g. Database.refresh) before letting
+    the thread in, so the appends of the other processes are visible.
+
+    The API is the one of ReadWriteLock; a timeout covers both locks,
+    waiting for the file lock by polling it.
+
+    """
+
+    def __init__(self, lock_file, refresh=None, fair=False,
+                 instrument=False):
+        ReadWriteLock.__init__(self, fair, instrument)
+        self.lock_file = lock_file
+        self.refresh = refresh
+        self.fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        # Guards the shared file lock held on behalf of the readers.
+        self.file_mutex = threading.Lock()
+        self.file_readers = 0
+        self.generation = self._generation()
+        self.refreshes = 0
+
+    # Private methods
+
+    def _generation(self):
+        data = os.pread(self.fd, GENERATION.size, 0)
+        if len(data) < GENERATION.size:
+            return 0
+        return GENERATION.unpack(data)[0]
+
+    def _remaining(self, deadline):
+        if deadline is None:
+            return -1
+        return max(deadline - time.monotonic(), 0)
+
+    def _flock(self, operation, deadline):
+        """Take the file lock; return False once the deadline passed."""
+        if deadline is None:
+            fcntl.flock(self.fd, operation)
+            return True
+        while True:
+            try:
+                fcntl.flock(self.fd, operation | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                time.sleep(min(RETRY_INTERVAL, remaining))
+
+    def _catch_up(self):
+        """Refresh if another process has written since we last looked."""
+        generation = self._generation()
+        if generation != self.generation:
+            self.generation = generation
+            if self.refresh is not None:
+                self.refresh()
+                self.refreshes = self.refreshes + 1
+
+    # Public methods
+
+    def read_acquire(self, blocking=True, timeout=-1):
+        deadline = _deadline(blocking, timeout)
+        if not ReadWriteLock.read_acquire(self,
+                                          timeout=self._remaining(deadline)):
+            return False
+        if not _acquire(self.file_mutex, deadline):
+            ReadWriteLock.read_release(self)
+            return False
+        try:
+            if self.file_readers == 0:
+                if not self._flock(fcntl.LOCK_SH, deadline):
+                    ReadWriteLock.read_release(self)
+                    return False
+                self._catch_up()
+            self.file_readers = self.file_readers + 1
+            return True
+        finally:
+            self.file_mutex.release()
+
+    def read_release(self):
+        self.file_mutex.acquire()
+        try:
+            self.file_readers = self.file_readers - 1
+            if self.file_readers == 0:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+        finally:
+            self.file_mutex.release()
+        ReadWriteLock.read_release(self)
+
+    def write_acquire(self, blocking=True, timeout=-1):
+        deadline = _deadline(blocking, timeout)
+        if not ReadWriteLock.write_acquire(self,
+                                           timeout=self._remaining(deadline)):
+            return False
+        if not self._flock(fcntl.LOCK_EX, deadline):
+            ReadWriteLock.write_release(self)
+            return False
+        self._catch_up()
+        return True
+
+    def write_release(self):
+        self.generation = self.generation + 1
+        os.pwrite(self.fd, GENERATION.pack(self.generation), 0)
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        ReadWriteLock.write_release(self)
+
+    def stats(self):
+        """Return the statistics of the lock and of the refreshes."""
+        stats = ReadWriteLock.stats(self)
+        stats["generation"] = self.generation
+        stats["refreshes"] = self.refreshes
+        return stats
+
+    def close(self):
+        os.close(self.fd)
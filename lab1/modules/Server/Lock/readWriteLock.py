@@ -9,7 +9,37 @@
 
 """Class implementing a readers-writers lock."""
 
+import contextlib
 import threading
+import time
+
+from .lockStats import LockStats
+
+
+class LockTimeout(Exception):
+
+    """Raised when a lock could not be acquired in time."""
+
+    pass
+
+
+def _deadline(blocking, timeout):
+    """Return when to give up waiting, None to wait for ever."""
+    if not blocking:
+        return time.monotonic()
+    if timeout is None or timeout < 0:
+        return None
+    return time.monotonic() + timeout
+
+
+def _acquire(lock, deadline):
+    """Acquire a threading.Lock before the deadline."""
+    if deadline is None:
+        return lock.acquire()
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return lock.acquire(False)
+    return lock.acquire(True, remaining)
 
 
 class ReadWriteLock(object):
@@ -25,31 +55,213 @@ class ReadWriteLock(object):
             reading the resource,
         --  only one writer is allowed to modify the resource and all
             other existing readers and writers are blocked.
+
+    By default the lock prefers the readers: a writer waits until no
+    reader at all holds the lock, which may never happen under a steady
+    flow of overlapping readers. If fair is True, the lock is
+    phase-fair instead: a reader arriving while a writer waits queues
+    behind it, and a writer releasing the lock lets in all the readers
+    that were waiting before the next writer. A writer thus waits for
+    at most the readers already in and one writer ahead of it, and a
+    reader for at most two writers.
+
+    If instrument is True, the lock keeps LockStats of its acquisitions
+    (wait and hold time histograms, queued and contended acquisitions),
+    returned with the number of readers by stats().
+
+    read_acquire() and write_acquire() take the blocking and timeout
+    arguments of threading.Lock.acquire() and return whether the lock
+    was acquired. reading() and writing() are the matching context
+    managers; they raise LockTimeout if the lock is not acquired.
     """
 
-    def __init__(self):
+    def __init__(self, fair=False, instrument=False):
         self.reader_count = 0
         self.reader_lock = threading.Lock()
         self.writer_lock = threading.Lock()
+        self.fair = fair
+        self.condition = threading.Condition(threading.Lock())
+        self.writer_active = False
+        self.writers_waiting = 0
+        self.readers_waiting = 0
+        # Number of writes done, and number of waiting readers let in
+        # ahead of the waiting writers by the last one.
+        self.writes_done = 0
+        self.readers_granted = 0
+        self.lock_stats = LockStats() if instrument else None
 
-    # Public methods
+    # Private methods
 
-    def read_acquire(self):
-        self.reader_lock.acquire()
+    def _busy(self, kind):
+        """Return True if an access of the given kind would have to wait."""
+        if self.fair:
+            if kind == "read":
+                return self.writer_active or self.writers_waiting > 0
+            return (self.writer_active or self.reader_count > 0 or
+                    self.writers_waiting > 0 or self.readers_granted > 0)
+        if kind == "read":
+            return (self.reader_lock.locked() or
+                    (self.reader_count == 0 and self.writer_lock.locked()))
+        return self.writer_lock.locked()
+
+    def _wait(self, deadline):
+        """Wait on the condition; return False once the deadline passed."""
+        if deadline is None:
+            self.condition.wait()
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        self.condition.wait(remaining)
+        return True
+
+    def _read_acquire(self, deadline):
+        if self.fair:
+            return self._fair_read_acquire(deadline)
+        if not _acquire(self.reader_lock, deadline):
+            return False
         if self.reader_count == 0:
-            self.writer_lock.acquire()
+            if not _acquire(self.writer_lock, deadline):
+                self.reader_lock.release()
+                return False
         self.reader_count = self.reader_count + 1
         self.reader_lock.release()
+        return True
 
-    def read_release(self):
+    def _read_release(self):
+        if self.fair:
+            return self._fair_read_release()
         self.reader_lock.acquire()
         self.reader_count = self.reader_count - 1
         if self.reader_count == 0:
             self.writer_lock.release()
         self.reader_lock.release()
 
-    def write_acquire(self):
-        self.writer_lock.acquire()
+    def _write_acquire(self, deadline):
+        if self.fair:
+            return self._fair_write_acquire(deadline)
+        return _acquire(self.writer_lock, deadline)
 
-    def write_release(self):
+    def _write_release(self):
+        if self.fair:
+            return self._fair_write_release()
         self.writer_lock.release()
+
+    def _fair_read_acquire(self, deadline):
+        with self.condition:
+            ticket = self.writes_done
+            if self.writer_active or self.writers_waiting > 0:
+                self.readers_waiting = self.readers_waiting + 1
+                # A writer that has released the lock since we arrived
+                # let us in ahead of the writers still waiting.
+                acquired = True
+                while (self.writer_active or
+                       (self.writers_waiting > 0 and
+                        ticket == self.writes_done)):
+                    if not self._wait(deadline):
+                        acquired = False
+                        break
+                self.readers_waiting = self.readers_waiting - 1
+                if ticket != self.writes_done and self.readers_granted > 0:
+                    # Entering or not, we no longer hold back the writers.
+                    self.readers_granted = self.readers_granted - 1
+                    if self.readers_granted == 0:
+                        self.condition.notify_all()
+                if not acquired:
+                    return False
+            self.reader_count = self.reader_count + 1
+            return True
+
+    def _fair_read_release(self):
+        with self.condition:
+            self.reader_count = self.reader_count - 1
+            if self.reader_count == 0:
+                self.condition.notify_all()
+
+    def _fair_write_acquire(self, deadline):
+        with self.condition:
+            self.writers_waiting = self.writers_waiting + 1
+            while (self.writer_active or self.reader_count > 0 or
+                   self.readers_granted > 0):
+                if not self._wait(deadline):
+                    self.writers_waiting = self.writers_waiting - 1
+                    # The readers queued behind us may go in.
+                    self.condition.notify_all()
+                    return False
+            self.writers_waiting = self.writers_waiting - 1
+            self.writer_active = True
+            return True
+
+    def _fair_write_release(self):
+        with self.condition:
+            self.writer_active = False
+            self.writes_done = self.writes_done + 1
+            self.readers_granted = self.readers_waiting
+            self.condition.notify_all()
+
+    # Public methods
+
+    def read_acquire(self, blocking=True, timeout=-1):
+        deadline = _deadline(blocking, timeout)
+        if self.lock_stats is None:
+            return self._read_acquire(deadline)
+        start = self.lock_stats.arrive("read", self._busy("read"))
+        if not self._read_acquire(deadline):
+            self.lock_stats.gave_up("read")
+            return False
+        self.lock_stats.acquired("read", start)
+        return True
+
+    def read_release(self):
+        if self.lock_stats is not None:
+            self.lock_stats.released("read")
+        self._read_release()
+
+    def write_acquire(self, blocking=True, timeout=-1):
+        deadline = _deadline(blocking, timeout)
+        if self.lock_stats is None:
+            return self._write_acquire(deadline)
+        start = self.lock_stats.arrive("write", self._busy("write"))
+        if not self._write_acquire(deadline):
+            self.lock_stats.gave_up("write")
+            return False
+        self.lock_stats.acquired("write", start)
+        return True
+
+    def write_release(self):
+        if self.lock_stats is not None:
+            self.lock_stats.released("write")
+        self._write_release()
+
+    @contextlib.contextmanager
+    def reading(self, blocking=True, timeout=-1):
+        """Hold the lock for reading in a with statement."""
+        if not self.read_acquire(blocking, timeout):
+            raise LockTimeout("The lock was not acquired for reading.")
+        try:
+            yield self
+        finally:
+            self.read_release()
+
+    @contextlib.contextmanager
+    def writing(self, blocking=True, timeout=-1):
+        """Hold the lock for writing in a with statement."""
+        if not self.write_acquire(blocking, timeout):
+            raise LockTimeout("The lock was not acquired for writing.")
+        try:
+            yield self
+        finally:
+            self.write_release()
+
+    def stats(self):
+        """Return the policy, the number of readers and the LockStats."""
+        stats = {
+            "policy": "phase-fair" if self.fair else "reader-preferring",
+            "readers": self.reader_count
+        }
+        if self.fair:
+            stats["queued_writers"] = self.writers_waiting
+        if self.lock_stats is not None:
+            stats.update(self.lock_stats.stats())
+            stats["queued_writers"] = stats["write"]["queued"]
+        return stats
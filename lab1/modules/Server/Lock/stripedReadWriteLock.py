@@ -0,0 +1,156 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Readers-writer lock counting its readers on several stripes."""
+
+import itertools
+import threading
+import time
+
+from .readWriteLock import ReadWriteLock, _acquire
+
+# Default number of stripes of the reader count.
+STRIPES = 16
+
+
+class _Stripe(object):
+
+    """A share of the readers of a StripedReadWriteLock."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
+        self.count = 0
+        # True while a writer holds, or is draining, this stripe.
+        self.blocked = False
+
+
+class StripedReadWriteLock(ReadWriteLock):
+
+    """ReadWriteLock whose readers do not share a single mutex.
+
+    In the default policy every reader takes the same reader_lock, twice
+    per access, only to update reader_count. Here the reader count is
+    split into stripes, each with a lock of its own, and each thread
+    always counts itself on the same stripe: readers of different
+    stripes never wait on each other. A writer takes the writer lock,
+    then blocks and drains every stripe in turn, waiting for their
+    readers to leave. A reader arriving on a blocked stripe waits for
+    the writer, so that writers are not starved by a steady flow of
+    readers, but a writer pays for the number of stripes.
+
+    A read must be released by the thread that acquired it. The API is
+    the one of ReadWriteLock; with fair=True the lock is the phase-fair
+    ReadWriteLock, without stripes.
+
+    """
+
+    def __init__(self, fair=False, instrument=False, stripes=STRIPES):
+        ReadWriteLock.__init__(self, fair, instrument)
+        self.stripes = [_Stripe() for i in range(stripes)]
+        self.next_stripe = itertools.count()
+        self.local = threading.local()
+
+    # Private methods
+
+    def _stripe(self):
+        """Return the stripe of the calling thread."""
+        try:
+            return self.local.stripe
+        except AttributeError:
+            n = next(self.next_stripe) % len(self.stripes)
+            self.local.stripe = self.stripes[n]
+            return self.local.stripe
+
+    def _readers(self):
+        if self.fair:
+            return self.reader_count
+        return sum(s.count for s in self.stripes)
+
+    def _busy(self, kind):
+        if self.fair:
+            return ReadWriteLock._busy(self, kind)
+        if kind == "read":
+            return self._stripe().blocked
+        return self.writer_lock.locked() or self._readers() > 0
+
+    def _read_acquire(self, deadline):
+        if self.fair:
+            return self._fair_read_acquire(deadline)
+        stripe = self._stripe()
+        stripe.lock.acquire()
+        try:
+            while stripe.blocked:
+                if deadline is None:
+                    stripe.condition.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                stripe.condition.wait(remaining)
+            stripe.count = stripe.count + 1
+            return True
+        finally:
+            stripe.lock.release()
+
+    def _read_release(self):
+        if self.fair:
+            return self._fair_read_release()
+        stripe = self._stripe()
+        stripe.lock.acquire()
+        stripe.count = stripe.count - 1
+        if stripe.count == 0 and stripe.blocked:
+            stripe.condition.notify_all()
+        stripe.lock.release()
+
+    def _unblock(self, stripes):
+        for stripe in stripes:
+            with stripe.condition:
+                stripe.blocked = False
+                stripe.condition.notify_all()
+
+    def _write_acquire(self, deadline):
+        if self.fair:
+            return self._fair_write_acquire(deadline)
+        if not _acquire(self.writer_lock, deadline):
+            return False
+        for n, stripe in enumerate(self.stripes):
+            with stripe.condition:
+                stripe.blocked = True
+                while stripe.count > 0:
+                    if deadline is None:
+                        stripe.condition.wait()
+                        continue
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    stripe.condition.wait(remaining)
+                drained = stripe.count == 0
+            if not drained:
+                self._unblock(self.stripes[:n + 1])
+                self.writer_lock.release()
+                return False
+        return True
+
+    def _write_release(self):
+        if self.fair:
+            return self._fair_write_release()
+        self._unblock(self.stripes)
+        self.writer_lock.release()
+
+    # Public methods
+
+    def stats(self):
+        """Return the policy, the number of readers and the LockStats."""
+        stats = ReadWriteLock.stats(self)
+        if not self.fair:
+            stats["policy"] = "striped"
+            stats["stripes"] = len(self.stripes)
+            stats["readers"] = self._readers()
+        return stats
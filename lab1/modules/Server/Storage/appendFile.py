@@ -0,0 +1,138 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Append-only file handle with a configurable durability."""
+
+import os
+import threading
+import time
+
+DURABILITIES = ("buffered", "flush", "fsync")
+
+# Longest time appended data stays in the buffer in "buffered" mode.
+FLUSH_INTERVAL = 0.01
+
+
+class AppendFile(object):
+
+    """Binary file opened for appending, kept open between writes.
+
+    The durability decides what append() waits for:
+        --  "buffered" :: the data is only copied into the buffer of the
+            handle; a timer hands it to the OS within FLUSH_INTERVAL
+            seconds, so a crash may lose the last few milliseconds of
+            writes,
+        --  "flush"    :: the data is handed to the OS, so it survives a
+            crash of the process but not of the machine (the default),
+        --  "fsync"    :: the data is flushed to the disk.
+
+    Public methods:
+        --  append(data)
+        --  flush()
+        --  tell()
+        --  size()
+        --  stats()
+        --  close()
+
+    """
+
+    def __init__(self, path, durability="flush"):
+        if durability not in DURABILITIES:
+            raise ValueError("Unknown durability: '{}'".format(durability))
+        self.path = path
+        self.durability = durability
+        self.f = open(path, 'ab')
+        self.lock = threading.Lock()
+        self.timer = None
+        self.appends = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_time = 0.0
+
+    # Private methods
+
+    def _timed_flush(self):
+        self.lock.acquire()
+        try:
+            self.timer = None
+            if not self.f.closed:
+                self.f.flush()
+        finally:
+            self.lock.release()
+
+    # Public methods
+
+    def append(self, data):
+        """Append data to the file, as durably as configured."""
+        start = time.perf_counter()
+        self.lock.acquire()
+        try:
+            self.f.write(data)
+            if self.durability == "buffered":
+                if self.timer is None:
+                    self.timer = threading.Timer(FLUSH_INTERVAL,
+                                                 self._timed_flush)
+                    self.timer.daemon = True
+                    self.timer.start()
+            else:
+                self.f.flush()
+                if self.durability == "fsync":
+                    os.fsync(self.f.fileno())
+        finally:
+            self.lock.release()
+        elapsed = time.perf_counter() - start
+        self.appends = self.appends + 1
+        self.total_time = self.total_time + elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.last_time = elapsed
+
+    def flush(self):
+        """Hand the buffered data to the OS."""
+        self.lock.acquire()
+        try:
+            self.f.flush()
+        finally:
+            self.lock.release()
+
+    def tell(self):
+        """Return the size of the file, including the buffered data."""
+        self.lock.acquire()
+        try:
+            return self.f.tell()
+        finally:
+            self.lock.release()
+
+    def size(self):
+        """Return the size of the file on disk, without the buffered data.
+
+        Only fstat() is called: nothing is flushed or read.
+
+        """
+        return os.fstat(self.f.fileno()).st_size
+
+    def stats(self):
+        """Return the durability and the observed append latency."""
+        mean = self.total_time / self.appends if self.appends else 0.0
+        return {
+            "durability": self.durability,
+            "appends": self.appends,
+            "mean_latency_ms": mean * 1000,
+            "max_latency_ms": self.max_time * 1000,
+            "last_latency_ms": self.last_time * 1000
+        }
+
+    def close(self):
+        self.lock.acquire()
+        try:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            self.f.close()
+        finally:
+            self.lock.release()
@@ -0,0 +1,124 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Sidecar file holding the record offsets of a fortune file.
+
+The index is stored next to the fortune file (fortune.db.idx) and has
+the following layout:
+
+    --  header  :: magic, length of the fortune file covered by the
+                   index, number of offsets, checksum of the covered
+                   data and checksum of the offsets,
+    --  offsets :: the record start offsets, as unsigned 64 bit
+                   integers.
+
+The checksum of the covered data is computed over its first and last
+FINGERPRINT_SIZE bytes only, so that checking the index does not mean
+reading the whole fortune file again. New offsets are appended to the
+end of the index and the header is rewritten afterwards; a crash in
+between leaves a header that still describes a valid prefix.
+
+"""
+
+import array
+import os
+import struct
+import zlib
+
+MAGIC = b"FORTIDX1"
+HEADER = struct.Struct("<8sQQII")
+FINGERPRINT_SIZE = 4096
+
+
+def fingerprint(data, length):
+    """Return the checksum of the first length bytes of data."""
+    if length == 0:
+        return 0
+    head = data[:min(length, FINGERPRINT_SIZE)]
+    tail = data[max(length - FINGERPRINT_SIZE, 0):length]
+    return zlib.crc32(tail, zlib.crc32(head))
+
+
+class IndexFile(object):
+
+    """Persistent array of record offsets.
+
+    A read_only index must exist (OSError otherwise), and can only be
+    loaded.
+
+    Public methods:
+        --  load(data, size)
+        --  save(starts, length, data)
+        --  update(starts, length, data)
+        --  close()
+
+    """
+
+    def __init__(self, idx_file, read_only=False):
+        self.idx_file = idx_file
+        if read_only:
+            self.fd = os.open(idx_file, os.O_RDONLY)
+        else:
+            self.fd = os.open(idx_file, os.O_RDWR | os.O_CREAT, 0o644)
+        self.count = 0
+        self.offsets_crc = 0
+
+    # Private methods
+
+    def _write_header(self, length, data):
+        header = HEADER.pack(MAGIC, length, self.count,
+                             fingerprint(data, length), self.offsets_crc)
+        os.pwrite(self.fd, header, 0)
+
+    # Public methods
+
+    def load(self, data, size):
+        """Return (starts, length) as stored in the index.
+
+        Return None if the index is missing, damaged, or does not
+        describe the given data (of the given size) any more.
+
+        """
+        header = os.pread(self.fd, HEADER.size, 0)
+        if len(header) != HEADER.size:
+            return None
+        magic, length, count, data_crc, offsets_crc = HEADER.unpack(header)
+        if magic != MAGIC or length > size or count == 0:
+            return None
+        if fingerprint(data, length) != data_crc:
+            return None
+        raw = os.pread(self.fd, count * 8, HEADER.size)
+        if len(raw) != count * 8 or zlib.crc32(raw) != offsets_crc:
+            return None
+        starts = array.array('Q')
+        starts.frombytes(raw)
+        self.count = count
+        self.offsets_crc = offsets_crc
+        return starts, length
+
+    def save(self, starts, length, data):
+        """Replace the content of the index."""
+        raw = starts.tobytes()
+        self.count = len(starts)
+        self.offsets_crc = zlib.crc32(raw)
+        os.ftruncate(self.fd, HEADER.size)
+        os.pwrite(self.fd, raw, HEADER.size)
+        self._write_header(length, data)
+
+    def update(self, starts, length, data):
+        """Append the offsets added to starts since the last update."""
+        if len(starts) > self.count:
+            raw = starts[self.count:].tobytes()
+            os.pwrite(self.fd, raw, HEADER.size + self.count * 8)
+            self.count = len(starts)
+            self.offsets_crc = zlib.crc32(raw, self.offsets_crc)
+        self._write_header(length, data)
+
+    def close(self):
+        os.close(self.fd)
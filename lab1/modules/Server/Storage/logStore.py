@@ -0,0 +1,385 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Fortune file made of length-prefixed, checksummed records.
+
+File layout:
+    --  MAGIC,
+    --  a sequence of records, each made of a RECORD_HEADER (length of
+        the record, CRC-32 of the record) followed by the encoded
+        record.
+
+Unlike the '%'-separated format, a record torn by a crash in the middle
+of a write cannot merge with the next one: its length or its checksum
+gives it away.
+
+"""
+
+import array
+import mmap
+import multiprocessing
+import os
+import struct
+import threading
+import zlib
+
+from .appendFile import AppendFile
+from .fortuneFile import SEPARATOR, ENCODING, read_chunks
+from .indexFile import IndexFile
+from .storageEngine import StorageEngine
+
+MAGIC = b"FORTLOG1"
+RECORD_HEADER = struct.Struct("<II")
+
+
+def pack_records(records):
+    """Return the encoded records framed for the log."""
+    return b"".join(RECORD_HEADER.pack(len(r), zlib.crc32(r)) + r
+                    for r in records)
+
+
+def scan_records(data, start, end, check=True):
+    """Walk the records of data from offset start to offset end.
+
+    Return the end offsets of the complete records found, and the
+    offset where the walk stopped: end, or the start of the first
+    record that is torn or, if check is True, fails its checksum.
+
+    """
+    ends = array.array('Q')
+    pos = start
+    while pos + RECORD_HEADER.size <= end:
+        length, crc = RECORD_HEADER.unpack_from(data, pos)
+        stop = pos + RECORD_HEADER.size + length
+        if stop > end:
+            break
+        if check and zlib.crc32(data[pos + RECORD_HEADER.size:stop]) != crc:
+            break
+        ends.append(stop)
+        pos = stop
+    return ends, pos
+
+
+class LogStore(StorageEngine):
+
+    """Fortune log accessed through mmap.
+
+    Like MmapStore, only the offsets of the records are kept in memory
+    and in a sidecar index (see IndexFile), so opening the log only
+    reads the records appended since the index was last updated. These
+    are checked against their CRC on the way, and the log is truncated
+    at the first torn or damaged one: after a crash, recovery costs the
+    tail written since the last update of the index, not the whole
+    file. The records covered by the index are checked when they are
+    read, and by verify(). If recover is False, the bad tail is only
+    left out of the index, and the file is not modified. A read_only
+    store neither recovers nor keeps an index, and cannot be appended
+    to: the log is only read, as by verify() and the conversions.
+
+    Public methods:
+        --  count()
+        --  get(index)
+        --  append_many(fortunes)
+        --  refresh()
+        --  stats()
+        --  close()
+
+    """
+
+    def __init__(self, db_file, durability="flush", persist_index=True,
+                 recover=True, read_only=False):
+        StorageEngine.__init__(self, db_file, durability)
+        self.lock = threading.Lock()
+        if read_only:
+            persist_index = False
+            recover = False
+        elif not os.path.exists(db_file) or os.path.getsize(db_file) == 0:
+            with open(db_file, 'wb') as f:
+                f.write(MAGIC)
+        self.f = open(db_file, 'rb')
+        if self.f.read(len(MAGIC)) != MAGIC:
+            self.f.close()
+            raise ValueError("'{}' is not a fortune log.".format(db_file))
+        self.mm = None
+        self.size = 0
+        self.starts = array.array('Q', [len(MAGIC)])
+        self.truncated = 0
+        self.index = None
+        if persist_index:
+            try:
+                self.index = IndexFile(db_file + ".idx")
+            except OSError:
+                # No index if the directory is not writable.
+                self.index = None
+        self._remap()
+        loaded = None
+        if self.index is not None:
+            loaded = self.index.load(self.mm, self.size)
+        if loaded is not None:
+            self.starts = loaded[0]
+        if recover:
+            self._recover()
+        else:
+            self._scan()
+        self.out = None
+        if not read_only:
+            self.out = AppendFile(db_file, durability)
+        if self.index is not None:
+            if loaded is None:
+                self.index.save(self.starts, self.starts[-1], self.mm)
+            else:
+                self.index.update(self.starts, self.starts[-1], self.mm)
+
+    # Private methods
+
+    def _remap(self):
+        """Map the file again if it has grown since the last mapping."""
+        size = os.fstat(self.f.fileno()).st_size
+        if size > self.size:
+            self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.size = size
+
+    def _scan(self):
+        """Index the complete, valid records after the indexed ones."""
+        ends, pos = scan_records(self.mm, self.starts[-1], self.size)
+        self.starts.extend(ends)
+        return pos
+
+    def _recover(self):
+        """Index the tail of the log and cut it at its first bad record."""
+        pos = self._scan()
+        if pos != self.size:
+            self.truncated = self.size - pos
+            # Nobody else holds the map yet.
+            self.mm.close()
+            os.truncate(self.db_file, pos)
+            self.size = 0
+            self._remap()
+
+    def _refresh(self):
+        self._remap()
+        self._scan()
+        if self.index is not None:
+            self.index.update(self.starts, self.starts[-1], self.mm)
+
+    # Public methods
+
+    def count(self):
+        """Return the number of records in the log."""
+        return len(self.starts) - 1
+
+    def get(self, index):
+        """Return the record with the given index."""
+        start = self.starts[index]
+        end = self.starts[index + 1]
+        length, crc = RECORD_HEADER.unpack_from(self.mm, start)
+        data = self.mm[start + RECORD_HEADER.size:end]
+        if zlib.crc32(data) != crc:
+            raise IOError("Record {} of '{}' is corrupted."
+                          .format(index, self.db_file))
+        return data.decode(ENCODING, "replace")
+
+    def append_many(self, fortunes):
+        """Append several records to the log with a single write."""
+        if self.out is None:
+            raise IOError("'{}' is opened read-only.".format(self.db_file))
+        data = pack_records([f.encode(ENCODING) for f in fortunes])
+        self.lock.acquire()
+        try:
+            self.out.append(data)
+            if self.out.durability == "buffered":
+                self.out.flush()
+            self._refresh()
+        finally:
+            self.lock.release()
+
+    def refresh(self):
+        """Index the records appended to the log by other programs.
+
+        A torn record at the end of the log is not indexed until it is
+        complete; it is not truncated, as its writer may still be at
+        work. Return the number of new records.
+
+        """
+        self.lock.acquire()
+        try:
+            before = self.count()
+            self._refresh()
+            return self.count() - before
+        finally:
+            self.lock.release()
+
+    def stats(self):
+        """Return the statistics of the writes to the log."""
+        stats = self.out.stats() if self.out is not None else {}
+        stats["recovered_bytes_dropped"] = self.truncated
+        return stats
+
+    def close(self):
+        if self.index is not None:
+            self.index.close()
+        if self.out is not None:
+            self.out.close()
+        self.f.close()
+
+
+def _valid_record(data, pos, end):
+    """Return True if a whole record with a good checksum is at pos."""
+    if pos + RECORD_HEADER.size > end:
+        return False
+    length, crc = RECORD_HEADER.unpack_from(data, pos)
+    stop = pos + RECORD_HEADER.size + length
+    return (stop <= end and
+            zlib.crc32(data[pos + RECORD_HEADER.size:stop]) == crc)
+
+
+def _resync(data, pos, end):
+    """Return the start of the next good record after a bad one at pos.
+
+    The length of the bad record is tried first, as a damaged record
+    usually keeps it; then every following offset. Return end if no
+    good record is left before it.
+
+    """
+    if pos + RECORD_HEADER.size <= end:
+        length, crc = RECORD_HEADER.unpack_from(data, pos)
+        stop = pos + RECORD_HEADER.size + length
+        if stop == end or (stop < end and _valid_record(data, stop, end)):
+            return stop
+    for p in range(pos + 1, end):
+        if _valid_record(data, p, end):
+            return p
+    return end
+
+
+def _verify_range(args):
+    """Check the records of a byte range of a log, in a pool worker.
+
+    Return the number of good records and the offsets of the bad ones;
+    the check goes on past a bad record, from the next good one.
+
+    """
+    path, start, end = args
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            checked = 0
+            bad = []
+            pos = start
+            while True:
+                ends, pos = scan_records(mm, pos, end)
+                checked = checked + len(ends)
+                if pos == end:
+                    return checked, bad
+                bad.append(pos)
+                pos = _resync(mm, pos, end)
+        finally:
+            mm.close()
+
+
+def _record_starts(path, mm, size):
+    """Return the record offsets of a log, without checking the records.
+
+    The offsets are taken from the index, if there is a valid one, and
+    by walking the lengths of the records after it. The walk stops at a
+    length that goes past the end of the file.
+
+    """
+    starts = None
+    try:
+        index = IndexFile(path + ".idx", read_only=True)
+    except OSError:
+        index = None
+    if index is not None:
+        try:
+            loaded = index.load(mm, size)
+            if loaded is not None:
+                starts = loaded[0]
+        finally:
+            index.close()
+    if starts is None:
+        starts = array.array('Q', [len(MAGIC)])
+    ends, pos = scan_records(mm, starts[-1], size, check=False)
+    starts.extend(ends)
+    return starts
+
+
+def verify(path, processes=None, chunks_per_process=4):
+    """Check the checksum of every record of a log, in parallel.
+
+    The log is split into byte ranges of about the same size, along the
+    record offsets of the index and of a walk of the record lengths,
+    without reading the records themselves. Each range is then checked
+    by a process of a pool of processes (one per CPU by default). The
+    log is not modified. Return the number of good records and the
+    sorted offsets of the torn or damaged ones.
+
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("'{}' is not a fortune log.".format(path))
+        size = os.fstat(f.fileno()).st_size
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            starts = _record_starts(path, mm, size)
+        finally:
+            mm.close()
+    processes = processes or os.cpu_count() or 1
+    chunks = max(1, min(processes * chunks_per_process, len(starts) - 1))
+    first = starts[0]
+    last = starts[-1]
+    bounds = [first]
+    i = 0
+    for c in range(1, chunks):
+        target = first + (last - first) * c // chunks
+        while starts[i] < target:
+            i = i + 1
+        if starts[i] > bounds[-1]:
+            bounds.append(starts[i])
+    # The bytes after the last offset found, if any, make the last range.
+    if size > bounds[-1]:
+        bounds.append(size)
+    ranges = [(path, bounds[k], bounds[k + 1])
+              for k in range(len(bounds) - 1)]
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(_verify_range, ranges)
+    checked = sum(n for n, bad in results)
+    return checked, sorted(offset for n, bad in results for offset in bad)
+
+
+def convert_to_log(text_file, log_file):
+    """Convert a '%'-separated fortune file into the log format.
+
+    Return the number of records converted.
+
+    """
+    count = 0
+    with open(log_file, 'wb') as f:
+        f.write(MAGIC)
+        for records, end in read_chunks(text_file):
+            f.write(pack_records(records))
+            count = count + len(records)
+    return count
+
+
+def convert_from_log(log_file, text_file):
+    """Convert a fortune log into the '%' format.
+
+    The log is not modified: a torn tail is left out. Return the number
+    of records converted.
+
+    """
+    store = LogStore(log_file, read_only=True)
+    try:
+        with open(text_file, 'wb') as f:
+            for i in range(store.count()):
+                f.write(store.get(i).encode(ENCODING) + SEPARATOR)
+        return store.count()
+    finally:
+        store.close()
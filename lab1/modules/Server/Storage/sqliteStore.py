@@ -0,0 +1,248 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Fortunes kept in an SQLite database in WAL mode."""
+
+import sqlite3
+import threading
+import time
+import weakref
+
+from .fortuneFile import SEPARATOR, ENCODING, read_chunks
+from .storageEngine import StorageEngine
+
+SQLITE_MAGIC = b"SQLite format 3\x00"
+
+# synchronous setting of SQLite for each durability.
+SYNCHRONOUS = {
+    "buffered": "OFF",
+    "flush": "NORMAL",
+    "fsync": "FULL"
+}
+
+
+class _Reader(object):
+
+    """Holder of the connection of a reading thread.
+
+    It is only referenced by the thread-local storage of its thread, so
+    it is collected when the thread exits, and its finalizer then closes
+    the connection.
+
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+
+def _release(lock, connections, connection):
+    """Close a reader connection and forget it."""
+    lock.acquire()
+    try:
+        if connection in connections:
+            connections.remove(connection)
+    finally:
+        lock.release()
+    connection.close()
+
+
+class SqliteStore(StorageEngine):
+
+    """Fortune records in an SQLite table.
+
+    The records are the rows of a single table, numbered from 1 in the
+    order they were appended, so record i is the row with id i + 1 and
+    is read with a lookup of the primary key. The database is in WAL
+    mode: readers see the last committed state and are never blocked
+    by a writer. Each thread reads through a connection of its own,
+    closed when the thread exits; writes go through a single
+    connection, one transaction per append_many().
+
+    The durability maps to the synchronous setting of SQLite: with
+    "buffered" nothing is synced, with "flush" (synchronous=NORMAL) a
+    commit survives a crash of the process, and with "fsync"
+    (synchronous=FULL) every commit is synced to the disk.
+
+    Public methods:
+        --  count()
+        --  get(index)
+        --  append_many(fortunes)
+        --  refresh()
+        --  iterate()
+        --  watched_file()
+        --  stats()
+        --  close()
+
+    """
+
+    def __init__(self, db_file, durability="flush"):
+        if durability not in SYNCHRONOUS:
+            raise ValueError("Unknown durability: '{}'".format(durability))
+        StorageEngine.__init__(self, db_file, durability)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.connections = []
+        self.writer = self._connect()
+        self.writer.execute("PRAGMA journal_mode=WAL")
+        self.writer.execute(
+            "CREATE TABLE IF NOT EXISTS fortunes "
+            "(id INTEGER PRIMARY KEY, text TEXT NOT NULL)")
+        self.writer.commit()
+        self.records = self._max_id(self.writer)
+        self.appends = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_time = 0.0
+
+    # Private methods
+
+    def _connect(self):
+        with open(self.db_file, 'ab+') as f:
+            f.seek(0)
+            header = f.read(len(SQLITE_MAGIC))
+        if header and header != SQLITE_MAGIC:
+            raise ValueError("'{}' is not an SQLite fortune database."
+                             .format(self.db_file))
+        connection = sqlite3.connect(self.db_file, check_same_thread=False)
+        connection.execute("PRAGMA synchronous={}"
+                           .format(SYNCHRONOUS[self.durability]))
+        self.lock.acquire()
+        try:
+            self.connections.append(connection)
+        finally:
+            self.lock.release()
+        return connection
+
+    def _reader(self):
+        """Return the connection of the calling thread."""
+        reader = getattr(self.local, "reader", None)
+        if reader is None:
+            connection = self._connect()
+            reader = _Reader(connection)
+            weakref.finalize(reader, _release,
+                             self.lock, self.connections, connection)
+            self.local.reader = reader
+        return reader.connection
+
+    def _max_id(self, connection):
+        # fetchall() ends the statement, and with it the read
+        # transaction that would keep an old snapshot of the database.
+        rows = connection.execute("SELECT MAX(id) FROM fortunes").fetchall()
+        return rows[0][0] or 0
+
+    # Public methods
+
+    def count(self):
+        """Return the number of records."""
+        return self.records
+
+    def get(self, index):
+        """Return the record with the given index."""
+        rows = self._reader().execute(
+            "SELECT text FROM fortunes WHERE id = ?", (index + 1,)).fetchall()
+        if not rows:
+            raise IndexError("No record {} in '{}'."
+                             .format(index, self.db_file))
+        return rows[0][0]
+
+    def append_many(self, fortunes):
+        """Append several records in a single transaction."""
+        start = time.perf_counter()
+        self.lock.acquire()
+        try:
+            with self.writer:
+                self.writer.executemany(
+                    "INSERT INTO fortunes (text) VALUES (?)",
+                    ((f,) for f in fortunes))
+            self.records = self._max_id(self.writer)
+        finally:
+            self.lock.release()
+        elapsed = time.perf_counter() - start
+        self.appends = self.appends + 1
+        self.total_time = self.total_time + elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.last_time = elapsed
+
+    def refresh(self):
+        """Count the records appended by other programs.
+
+        Return the number of new records.
+
+        """
+        self.lock.acquire()
+        try:
+            before = self.records
+            self.records = self._max_id(self.writer)
+            return self.records - before
+        finally:
+            self.lock.release()
+
+    def iterate(self):
+        """Yield all the records in order."""
+        cursor = self._reader().execute(
+            "SELECT text FROM fortunes WHERE id <= ? ORDER BY id",
+            (self.records,))
+        for row in cursor:
+            yield row[0]
+
+    def watched_file(self):
+        """Return the write-ahead log, where the commits are appended."""
+        return self.db_file + "-wal"
+
+    def stats(self):
+        """Return the durability and the observed commit latency."""
+        mean = self.total_time / self.appends if self.appends else 0.0
+        return {
+            "durability": self.durability,
+            "appends": self.appends,
+            "mean_latency_ms": mean * 1000,
+            "max_latency_ms": self.max_time * 1000,
+            "last_latency_ms": self.last_time * 1000
+        }
+
+    def close(self):
+        self.lock.acquire()
+        try:
+            for connection in self.connections:
+                connection.close()
+            del self.connections[:]
+        finally:
+            self.lock.release()
+
+
+def convert_to_sqlite(text_file, sqlite_file):
+    """Convert a '%'-separated fortune file into an SQLite database.
+
+    Return the number of records converted.
+
+    """
+    store = SqliteStore(sqlite_file)
+    try:
+        for records, end in read_chunks(text_file):
+            store.append_many([r.decode(ENCODING, "replace")
+                               for r in records])
+        return store.count()
+    finally:
+        store.close()
+
+
+def convert_from_sqlite(sqlite_file, text_file):
+    """Convert an SQLite fortune database into the '%' format.
+
+    Return the number of records converted.
+
+    """
+    store = SqliteStore(sqlite_file)
+    try:
+        with open(text_file, 'wb') as f:
+            for record in store.iterate():
+                f.write(record.encode(ENCODING) + SEPARATOR)
+        return store.count()
+    finally:
+        store.close()
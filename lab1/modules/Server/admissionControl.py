@@ -0,0 +1,92 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Admission control of the requests of the server."""
+
+import threading
+import time
+
+
+class AdmissionControl(object):
+
+    """Bound on the requests in progress, and check of their deadlines.
+
+    A request is admitted with enter() and leaves with leave(). When
+    max_in_flight requests are already in progress, enter() refuses the
+    next one, which the server answers at once with a busy error instead
+    of letting it wait behind the others (0 sets no bound). expired()
+    tells whether the deadline of a request (a time.time() value, from
+    the request itself) has passed: its client has given up on it, so
+    the server drops it before doing any work.
+
+    Public methods:
+        --  expired(deadline)
+        --  enter()
+        --  leave()
+        --  stats()
+
+    """
+
+    def __init__(self, max_in_flight=0):
+        self.max_in_flight = max_in_flight
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.expired_count = 0
+
+    # Public methods
+
+    def expired(self, deadline):
+        """Return True, and count it, if deadline has passed."""
+        if deadline is None or time.time() < deadline:
+            return False
+        self.lock.acquire()
+        try:
+            self.expired_count = self.expired_count + 1
+        finally:
+            self.lock.release()
+        return True
+
+    def enter(self):
+        """Admit a request; return False if too many are in progress."""
+        self.lock.acquire()
+        try:
+            if 0 < self.max_in_flight <= self.in_flight:
+                self.rejected = self.rejected + 1
+                return False
+            self.in_flight = self.in_flight + 1
+            self.peak = max(self.peak, self.in_flight)
+            self.admitted = self.admitted + 1
+            return True
+        finally:
+            self.lock.release()
+
+    def leave(self):
+        self.lock.acquire()
+        try:
+            self.in_flight = self.in_flight - 1
+        finally:
+            self.lock.release()
+
+    def stats(self):
+        """Return the load and the rejections of the server."""
+        self.lock.acquire()
+        try:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self.in_flight,
+                "peak": self.peak,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "deadline_exceeded": self.expired_count
+            }
+        finally:
+            self.lock.release()
@@ -0,0 +1,151 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Inverted index over the words of the fortunes."""
+
+import array
+import bisect
+import re
+
+WORD = re.compile(r"\w+")
+
+# Random records of the shortest list tried by random_lookup() before it
+# intersects the lists.
+SAMPLES = 32
+
+
+def words(text):
+    """Return the set of lower-case words of a text."""
+    return set(WORD.findall(text.lower()))
+
+
+def _gallop(l, value, lo):
+    """Return the first position from lo of sorted l not below value."""
+    n = len(l)
+    hi = lo
+    step = 1
+    while hi < n and l[hi] < value:
+        lo = hi + 1
+        hi = hi + step
+        step = step * 2
+    return bisect.bisect_left(l, value, lo, min(hi, n))
+
+
+def _contains(l, value):
+    """Return whether sorted l holds value."""
+    pos = bisect.bisect_left(l, value)
+    return pos < len(l) and l[pos] == value
+
+
+class InvertedIndex(object):
+
+    """Maps every word to the indexes of the records containing it.
+
+    The record indexes of a word are kept in increasing order in an
+    array of unsigned 32 bit integers, so a search for several words
+    walks the shortest array and looks its records up in the others by
+    galloping (binary search over doubling steps): the cost depends on
+    the length of the shortest array, not on the total.
+
+    Public methods:
+        --  add(index, text)
+        --  lookup(term, limit)
+        --  random_lookup(term, rand)
+        --  stats()
+
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.records = 0
+
+    # Private methods
+
+    def _matching(self, term):
+        """Return the sorted list of postings matching all the words."""
+        lists = []
+        for word in words(term):
+            if word not in self.postings:
+                return []
+            lists.append(self.postings[word])
+        return sorted(lists, key=len)
+
+    def _intersect(self, lists):
+        """Yield the records of all the lists, in increasing order."""
+        first, others = lists[0], lists[1:]
+        positions = [0] * len(others)
+        for index in first:
+            for k, l in enumerate(others):
+                pos = _gallop(l, index, positions[k])
+                positions[k] = pos
+                if pos == len(l):
+                    # No larger record in this list: no more matches.
+                    return
+                if l[pos] != index:
+                    break
+            else:
+                yield index
+
+    # Public methods
+
+    def add(self, index, text):
+        """Index the words of the record with the given index."""
+        for word in words(text):
+            if word not in self.postings:
+                self.postings[word] = array.array('I')
+            self.postings[word].append(index)
+        self.records = self.records + 1
+
+    def lookup(self, term, limit):
+        """Return the indexes of at most limit records matching term.
+
+        A record matches if it contains all the words of term.
+
+        """
+        lists = self._matching(term)
+        if not lists:
+            return []
+        if len(lists) == 1:
+            return lists[0][:limit].tolist()
+        result = []
+        for index in self._intersect(lists):
+            if len(result) == limit:
+                break
+            result.append(index)
+        return result
+
+    def random_lookup(self, term, rand):
+        """Return the index of a random record matching term, or None.
+
+        Random records of the shortest list are tried first: the first
+        one found in all the other lists is as likely to be any of the
+        matches. The lists are only intersected if SAMPLES tries miss.
+
+        """
+        lists = self._matching(term)
+        if not lists:
+            return None
+        if len(lists) == 1:
+            return rand.choice(lists[0])
+        for i in range(SAMPLES):
+            index = rand.choice(lists[0])
+            if all(_contains(l, index) for l in lists[1:]):
+                return index
+        matches = list(self._intersect(lists))
+        if not matches:
+            return None
+        return rand.choice(matches)
+
+    def stats(self):
+        """Return the size of the index."""
+        return {
+            "records": self.records,
+            "words": len(self.postings),
+            "postings": sum(len(p) for p in list(self.postings.values()))
+        }
@@ -0,0 +1,89 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Cache of the records of the database encoded for the protocol."""
+
+import collections
+import json
+import threading
+
+# Approximate memory taken by an entry besides its bytes: the bytes
+# object, its key and its node in the OrderedDict.
+ENTRY_OVERHEAD = 150
+
+
+class ResponseCache(object):
+
+    """Least recently used cache of JSON-encoded records.
+
+    get() returns the record with the given index as the UTF-8 bytes of
+    its JSON string, ready to be spliced into a response: the record is
+    loaded and encoded (escapes included) on the first request only.
+    The records of the database are never modified, so the entries
+    never go stale. The least recently used entries are dropped once
+    the cache takes more than budget bytes (approximately).
+
+    Public methods:
+        --  get(index, load)
+        --  stats()
+
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.lock = threading.Lock()
+        self.entries = collections.OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Public methods
+
+    def get(self, index, load):
+        """Return the encoded record index, loaded with load(index)."""
+        self.lock.acquire()
+        try:
+            data = self.entries.get(index)
+            if data is not None:
+                self.entries.move_to_end(index)
+                self.hits = self.hits + 1
+                return data
+        finally:
+            self.lock.release()
+        # Encode outside of the lock; two threads may both do it.
+        data = json.dumps(load(index)).encode()
+        self.lock.acquire()
+        try:
+            self.misses = self.misses + 1
+            if index not in self.entries:
+                self.entries[index] = data
+                self.size = self.size + len(data) + ENTRY_OVERHEAD
+                while self.size > self.budget and self.entries:
+                    key, old = self.entries.popitem(last=False)
+                    self.size = self.size - len(old) - ENTRY_OVERHEAD
+                    self.evictions = self.evictions + 1
+            return data
+        finally:
+            self.lock.release()
+
+    def stats(self):
+        """Return the size and the hit rate of the cache."""
+        self.lock.acquire()
+        try:
+            return {
+                "budget": self.budget,
+                "bytes": self.size,
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+        finally:
+            self.lock.release()
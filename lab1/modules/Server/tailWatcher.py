@@ -0,0 +1,119 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Thread calling back when a file is modified."""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import threading
+import traceback
+
+# Seconds between two checks of the file when inotify is not available.
+POLL_INTERVAL = 1.0
+
+IN_MODIFY = 0x00000002
+
+
+def inotify_watch(path):
+    """Return a descriptor signalled when path is modified, or None.
+
+    inotify is only available on Linux; None is also returned when it
+    cannot be used for any other reason.
+
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init()
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(path), IN_MODIFY) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+class TailWatcher(threading.Thread):
+
+    """Calls callback() every time the watched file grows or changes.
+
+    The file is watched with inotify where available, and otherwise by
+    comparing its size and modification time every interval seconds.
+    With inotify the file is still checked every interval seconds, so
+    that a missed event only delays the callback. Exceptions
+    raised by callback() are printed and the watcher goes on.
+
+    Public methods:
+        --  stop()
+
+    """
+
+    def __init__(self, path, callback, interval=POLL_INTERVAL):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.path = path
+        self.callback = callback
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.fd = inotify_watch(path)
+        self.last = self._signature()
+
+    # Private methods
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    def _wait(self):
+        """Wait for a change of the file or for the interval to pass.
+
+        Return True if inotify reported a modification.
+
+        """
+        if self.fd is None:
+            self.stopped.wait(self.interval)
+            return False
+        ready, _, _ = select.select([self.fd], [], [], self.interval)
+        if ready:
+            # Drain the events, only their arrival matters.
+            os.read(self.fd, 4096)
+        return bool(ready)
+
+    def _call(self):
+        try:
+            self.callback()
+        except Exception:
+            traceback.print_exc()
+
+    # Public methods
+
+    def run(self):
+        while not self.stopped.is_set():
+            modified = self._wait()
+            if self.stopped.is_set():
+                break
+            # Two writes within the resolution of the modification time
+            # may leave the size and the time unchanged, which inotify
+            # still reports.
+            current = self._signature()
+            if modified or current != self.last:
+                self.last = current
+                self._call()
+        if self.fd is not None:
+            os.close(self.fd)
+
+    def stop(self):
+        """Stop watching the file."""
+        self.stopped.set()
@@ -0,0 +1,124 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Fixed set of threads running tasks from a bounded queue."""
+
+import queue
+import threading
+import time
+import traceback
+
+from .Lock.lockStats import Histogram
+
+
+class WorkerPool(object):
+
+    """Pool of worker threads fed by a bounded queue.
+
+    submit() queues a task (a callable without arguments) and returns at
+    once; a worker thread then runs it. When queue_depth tasks are
+    already waiting, submit() refuses the task and returns False, so
+    that a burst of work is turned away instead of piling up in threads
+    or in memory. queue_depth must be at least 1: a queue.Queue of size
+    0 would have no bound at all. The time each task spent in the queue is recorded in
+    a Histogram.
+
+    Public methods:
+        --  start()
+        --  submit(task)
+        --  stats()
+        --  stop()
+
+    """
+
+    def __init__(self, workers=32, queue_depth=128):
+        if queue_depth < 1:
+            raise ValueError("The queue depth must be at least 1.")
+        self.workers = workers
+        self.queue = queue.Queue(queue_depth)
+        self.threads = []
+        self.lock = threading.Lock()
+        self.wait = Histogram()
+        self.done = 0
+        self.rejected = 0
+        self.busy = 0
+
+    # Private methods
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            queued, task = item
+            start = time.perf_counter()
+            self.lock.acquire()
+            try:
+                self.wait.add(start - queued)
+                self.busy = self.busy + 1
+            finally:
+                self.lock.release()
+            try:
+                task()
+            except Exception:
+                # A task must not take its worker down with it.
+                traceback.print_exc()
+            finally:
+                self.lock.acquire()
+                try:
+                    self.busy = self.busy - 1
+                    self.done = self.done + 1
+                finally:
+                    self.lock.release()
+
+    # Public methods
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work,
+                                 name="worker-{}".format(i))
+            t.daemon = True
+            t.start()
+            self.threads.append(t)
+
+    def submit(self, task):
+        """Queue a task; return False if the queue is full."""
+        try:
+            self.queue.put_nowait((time.perf_counter(), task))
+            return True
+        except queue.Full:
+            self.lock.acquire()
+            try:
+                self.rejected = self.rejected + 1
+            finally:
+                self.lock.release()
+            return False
+
+    def stats(self):
+        """Return the size, the load and the queue wait of the pool."""
+        self.lock.acquire()
+        try:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue.maxsize,
+                "queued": self.queue.qsize(),
+                "busy": self.busy,
+                "done": self.done,
+                "rejected": self.rejected,
+                "queue_wait": self.wait.stats()
+            }
+        finally:
+            self.lock.release()
+
+    def stop(self):
+        """Let the workers finish the queued tasks and exit."""
+        for t in self.threads:
+            self.queue.put(None)
+        for t in self.threads:
+            t.join()
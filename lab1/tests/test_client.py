@@ -0,0 +1,120 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Tests of the client against an older, one-shot JSON server."""
+
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+LAB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab1")
+
+
+class OneShotServer(object):
+
+    """Server answering a JSON line per connection, as lab1 first did.
+
+    The answers carry no id, and an unknown method is answered with an
+    error, before the connection is closed.
+
+    """
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(16)
+        self.address = "127.0.0.1:{}".format(self.sock.getsockname()[1])
+        self.fortunes = ["An old fortune."]
+        self.requests = []
+        self.thread = threading.Thread(target=self._serve)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _answer(self, req):
+        if req["method"] == "read":
+            return {"result": self.fortunes[-1]}
+        if req["method"] == "write":
+            self.fortunes.append(req["args"][0])
+            return {"result": None}
+        if req["method"] == "write_many":
+            self.fortunes.extend(req["args"][0])
+            return {"result": None}
+        return {"error": {"name": "AttributeError",
+                          "args": ["No method {}.".format(req["method"])]}}
+
+    def _serve(self):
+        while True:
+            try:
+                conn, addr = self.sock.accept()
+            except OSError:
+                return
+            try:
+                worker = conn.makefile(mode="rw")
+                req = json.loads(worker.readline())
+                self.requests.append(req["method"])
+                worker.write(json.dumps(self._answer(req)) + '\n')
+                worker.flush()
+            except (OSError, ValueError):
+                pass
+            finally:
+                conn.close()
+
+    def close(self):
+        self.sock.close()
+
+
+class OneShotServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = OneShotServer()
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.close()
+        shutil.rmtree(self.dir)
+
+    def client(self, *args):
+        return subprocess.run(
+            [sys.executable, "client.py"] + list(args) +
+            [self.server.address],
+            cwd=LAB, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            timeout=30, universal_newlines=True)
+
+    def check_read(self, *args):
+        done = self.client(*args)
+        self.assertEqual(done.returncode, 0, done.stdout)
+        self.assertEqual(done.stdout.strip(), "An old fortune.")
+
+    def test_read_after_a_failed_negotiation(self):
+        self.check_read()
+        self.assertEqual(self.server.requests, ["_negotiate", "read"])
+
+    def test_read_with_json_lines(self):
+        self.check_read("--json-lines")
+
+    def test_load_in_several_batches(self):
+        path = os.path.join(self.dir, "fortunes.db")
+        with open(path, 'w') as f:
+            f.write("\n%\n".join("Fortune {}.".format(i) for i in range(10)))
+        for args in [[], ["--json-lines"]]:
+            self.server.fortunes = []
+            done = self.client("-l", path, "-b", "3", *args)
+            self.assertEqual(done.returncode, 0, done.stdout)
+            self.assertEqual(sorted(self.server.fortunes),
+                             ["Fortune {}.".format(i) for i in range(10)])
+
+
+if __name__ == "__main__":
+    unittest.main()
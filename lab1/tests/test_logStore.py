@@ -0,0 +1,76 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Tests of the checker of the fortune logs."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "modules"))
+from Server.Storage import logStore
+
+
+class VerifyTest(unittest.TestCase):
+
+    RECORDS = 1000
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "fortune.log")
+        self.records = [("Fortune {}.".format(i) * 3).encode()
+                        for i in range(self.RECORDS)]
+        with open(self.path, 'wb') as f:
+            f.write(logStore.MAGIC + logStore.pack_records(self.records))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def offset(self, i):
+        """Return the offset of record i."""
+        return len(logStore.MAGIC) + len(
+            logStore.pack_records(self.records[:i]))
+
+    def damage(self, offset, data):
+        with open(self.path, 'r+b') as f:
+            f.seek(offset)
+            f.write(data)
+
+    def test_intact(self):
+        self.assertEqual(logStore.verify(self.path, 2),
+                         (self.RECORDS, []))
+
+    def test_records_after_a_damaged_one_are_checked(self):
+        middle = self.offset(self.RECORDS // 2)
+        self.damage(middle + logStore.RECORD_HEADER.size, b"XX")
+        self.assertEqual(logStore.verify(self.path, 2),
+                         (self.RECORDS - 1, [middle]))
+
+    def test_every_damaged_record_is_reported(self):
+        bad = [self.offset(i) for i in (10, 500, 900)]
+        for offset in bad:
+            # A damaged length, which the walk cannot follow.
+            self.damage(offset, b"\xff\xff\xff\x7f")
+        self.assertEqual(logStore.verify(self.path, 2),
+                         (self.RECORDS - 3, bad))
+
+    def test_verify_uses_the_index_and_writes_nothing(self):
+        logStore.LogStore(self.path).close()
+        middle = self.offset(self.RECORDS // 2)
+        self.damage(middle + logStore.RECORD_HEADER.size, b"XX")
+        before = os.listdir(self.dir)
+        self.assertEqual(logStore.verify(self.path, 2),
+                         (self.RECORDS - 1, [middle]))
+        self.assertEqual(os.listdir(self.dir), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Load generator and latency benchmark of the fortune service.
+
+A number of simulated clients, one thread and one connection each, send
+requests to a fortune server: a lab1 server started by the benchmark (on
+a copy of its database) or already running, or the lab5 replicas found
+through the name service, among which the clients are spread. A request
+is a write with the given probability and a read otherwise (read_many
+when a read asks for more than one fortune).
+
+In the closed loop, a client sends its next request as soon as it has
+the answer to the previous one (after the think time). In the open loop,
+the clients send requests at a fixed total rate, each on a schedule of
+its own; a client that falls behind sends its late requests at once.
+
+The latency of a request in the open loop is taken from the time it was
+scheduled, not from the time it could be sent, so that the requests
+held back by a slow answer are not left out of the results (coordinated
+omission). In the closed loop there is no schedule: the latencies are
+corrected as HdrHistogram does, by adding the samples that a client
+would have taken during a long request, every expected interval (the
+think time plus the median latency). Both the raw and the corrected
+percentiles are reported, for the requests that succeeded; the errors
+are counted by name.
+
+The clients are Python threads; with many clients, or at high rates,
+the benchmark itself may saturate a core before the server does.
+
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import shlex
+import shutil
+import signal
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+
+sys.path.append("../modules")
+from Common import orb
+from Common import framing
+from Common.nameServiceLocation import name_service_address
+from Common.objectType import object_type
+
+PERCENTILES = [("p50", 0.50), ("p90", 0.90), ("p99", 0.99), ("p999", 0.999)]
+
+# -----------------------------------------------------------------------------
+# Initialize and read the command line arguments
+# -----------------------------------------------------------------------------
+
+
+def address(path):
+    addr = path.split(":")
+    if len(addr) == 2 and addr[1].isdigit():
+        return((addr[0], int(addr[1])))
+    else:
+        msg = "{} is not a correct server address.".format(path)
+        raise argparse.ArgumentTypeError(msg)
+
+description = """\
+Load generator for the fortune servers of lab1 and lab5. It reports the
+throughput and the latency percentiles, corrected for coordinated
+omission.\
+"""
+parser = argparse.ArgumentParser(description=description)
+target = parser.add_mutually_exclusive_group(required=True)
+target.add_argument(
+    "--lab1", action="store_true", dest="lab1", default=False,
+    help="Start a lab1 server on a copy of its database, and stop it "
+         "once done."
+)
+target.add_argument(
+    "-a", "--address", metavar="addr:port", dest="address", type=address,
+    help="Address of a running lab1 server or lab5 peer."
+)
+target.add_argument(
+    "--lab5", action="store_true", dest="lab5", default=False,
+    help="Spread the clients over the lab5 replicas registered at the "
+         "name service."
+)
+parser.add_argument(
+    "--server", metavar="FILE", dest="server",
+    default="../../lab1/lab1/server.py",
+    help="lab1 server started by --lab1. "
+         "Default: ../../lab1/lab1/server.py."
+)
+parser.add_argument(
+    "--server-args", metavar="ARGS", dest="server_args", default="",
+    help="Options of the lab1 server started by --lab1, given as "
+         "--server-args=\"--async -W 4\"."
+)
+parser.add_argument(
+    "--db", metavar="FILE", dest="db",
+    default="../../lab1/lab1/dbs/fortune.db",
+    help="Database copied for the lab1 server started by --lab1. "
+         "Default: ../../lab1/lab1/dbs/fortune.db."
+)
+parser.add_argument(
+    "-p", "--port", metavar="PORT", dest="port", type=int, default=40100,
+    help="Port of the lab1 server started by --lab1. Default: 40100."
+)
+parser.add_argument(
+    "--name-service", metavar="addr:port", dest="name_service",
+    type=address, default=name_service_address,
+    help="Address of the name service, for --lab5. Default: {}:{}."
+         .format(*name_service_address)
+)
+parser.add_argument(
+    "-t", "--type", metavar="TYPE", dest="type", default=object_type,
+    help="Type of the lab5 replicas, for --lab5."
+)
+parser.add_argument(
+    "-c", "--clients", metavar="N", dest="clients", type=int, default=16,
+    help="Number of simulated clients. Default: 16."
+)
+parser.add_argument(
+    "-d", "--duration", metavar="SECONDS", dest="duration", type=float,
+    default=10.0, help="Length of the measure. Default: 10."
+)
+parser.add_argument(
+    "--warmup", metavar="SECONDS", dest="warmup", type=float, default=1.0,
+    help="Time the clients run before the measure starts. Default: 1."
+)
+parser.add_argument(
+    "-r", "--rate", metavar="REQUESTS", dest="rate", type=float,
+    help="Run in the open loop, at this total number of requests per "
+         "second. Default: closed loop."
+)
+parser.add_argument(
+    "--think", metavar="SECONDS", dest="think", type=float, default=0.0,
+    help="Pause of a client between two requests in the closed loop. "
+         "Default: 0."
+)
+parser.add_argument(
+    "-w", "--writes", metavar="FRACTION", dest="writes", type=float,
+    default=0.05, help="Fraction of the requests that are writes. "
+                       "Default: 0.05."
+)
+parser.add_argument(
+    "-n", "--read-many", metavar="N", dest="read_many", type=int,
+    default=1, help="Number of fortunes per read. Default: 1."
+)
+parser.add_argument(
+    "-s", "--size", metavar="BYTES", dest="size", type=int, default=100,
+    help="Size of the written fortunes. Default: 100."
+)
+parser.add_argument(
+    "--binary", action="store_true", dest="binary", default=False,
+    help="Negotiate binary frames instead of JSON lines."
+)
+parser.add_argument(
+    "--timeout", metavar="SECONDS", dest="timeout", type=float,
+    default=10.0, help="Time after which a request is counted as failed "
+                       "and its connection reopened. Default: 10."
+)
+parser.add_argument(
+    "--json", metavar="FILE", dest="json",
+    help="Also write the results as JSON to FILE ('-' prints them "
+         "instead of the text report)."
+)
+opts = parser.parse_args()
+
+# -----------------------------------------------------------------------------
+# Auxiliary classes
+# -----------------------------------------------------------------------------
+
+
+class Connection(object):
+
+    """Connection of a simulated client to a server.
+
+    call() sends a request and returns the name of the error it got, or
+    None. The connection is reopened after a failure.
+
+    """
+
+    def __init__(self, address, binary=False, timeout=None):
+        self.address = tuple(address)
+        self.binary = binary
+        self.timeout = timeout
+        self.sock = None
+        self.framing = "json"
+
+    # Private methods
+
+    def _connect(self):
+        self.sock = socket.create_connection(self.address, self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile(mode="rb")
+        self.framing = "json"
+        if self.binary:
+            answer = self._exchange({"method": framing.NEGOTIATE,
+                                     "args": [framing.BINARY]})
+            self.framing = answer.get("result", "json")
+
+    def _exchange(self, msg):
+        if self.framing == framing.BINARY:
+            self.sock.sendall(framing.pack(msg))
+            answer = framing.read_frame(self.reader)
+        else:
+            self.sock.sendall((json.dumps(msg) + '\n').encode())
+            line = self.reader.readline()
+            answer = json.loads(line) if line else None
+        if answer is None:
+            raise ConnectionError("The server closed the connection.")
+        return answer
+
+    # Public methods
+
+    def call(self, method, args):
+        try:
+            if self.sock is None:
+                self._connect()
+            answer = self._exchange({"method": method, "args": args})
+        except (OSError, ValueError, framing.FramingError) as e:
+            self.close()
+            return type(e).__name__
+        if "error" in answer:
+            return answer["error"]["name"]
+        return None
+
+    def close(self):
+        if self.sock is not None:
+            self.reader.close()
+            self.sock.close()
+            self.sock = None
+
+
+class Client(threading.Thread):
+
+    """Simulated client, recording the latencies of its requests.
+
+    In the open loop, the client sends a request every interval seconds
+    from its first scheduled time; in the closed loop (interval None),
+    as soon as it can. The requests started before begin are not
+    recorded; no request is started after end.
+
+    """
+
+    def __init__(self, address, seed, begin, end, first=None,
+                 interval=None):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.conn = Connection(address, opts.binary, opts.timeout)
+        self.rand = random.Random(seed)
+        self.seed = seed
+        self.begin = begin
+        self.end = end
+        self.first = first
+        self.interval = interval
+        self.written = 0
+        # Latencies of the successful requests: from the time they were
+        # sent, and from the time they were scheduled (open loop only).
+        self.service = {"read": [], "write": []}
+        self.response = {"read": [], "write": []}
+        self.errors = {}
+
+    # Private methods
+
+    def _request(self):
+        if self.rand.random() < opts.writes:
+            self.written = self.written + 1
+            fortune = "bench {}-{} ".format(self.seed, self.written)
+            fortune = fortune + "x" * max(opts.size - len(fortune), 0)
+            return "write", "write", [fortune]
+        if opts.read_many > 1:
+            return "read", "read_many", [opts.read_many]
+        return "read", "read", []
+
+    def _record(self, kind, scheduled, sent, error):
+        now = time.monotonic()
+        if sent < self.begin:
+            return
+        if error is not None:
+            self.errors[error] = self.errors.get(error, 0) + 1
+            return
+        self.service[kind].append(now - sent)
+        self.response[kind].append(now - scheduled)
+
+    # Public methods
+
+    def run(self):
+        scheduled = self.first
+        try:
+            while True:
+                if self.interval is not None:
+                    pause = scheduled - time.monotonic()
+                    if pause > 0:
+                        time.sleep(pause)
+                sent = time.monotonic()
+                if sent >= self.end:
+                    break
+                if self.interval is None:
+                    scheduled = sent
+                kind, method, args = self._request()
+                error = self.conn.call(method, args)
+                self._record(kind, scheduled, sent, error)
+                if self.interval is not None:
+                    scheduled = scheduled + self.interval
+                elif opts.think > 0:
+                    time.sleep(opts.think)
+        finally:
+            self.conn.close()
+
+
+# -----------------------------------------------------------------------------
+# The benchmark
+# -----------------------------------------------------------------------------
+
+
+def corrected(samples, expected):
+    """Return samples with the ones a long request held back.
+
+    This is HdrHistogram's recordValueWithExpectedInterval: a sample
+    longer than expected stands for the requests that would have been
+    sent in the meantime, which would have waited for it.
+
+    """
+    result = list(samples)
+    if expected <= 0:
+        return result
+    for sample in samples:
+        missing = sample - expected
+        while missing >= expected:
+            result.append(missing)
+            missing = missing - expected
+    return result
+
+
+def percentiles(samples):
+    """Return the count, percentiles and maximum of samples, in ms."""
+    samples = sorted(samples)
+    stats = {"count": len(samples)}
+    for name, p in PERCENTILES:
+        if samples:
+            rank = max(int(math.ceil(p * len(samples))) - 1, 0)
+            stats[name] = samples[rank] * 1000
+        else:
+            stats[name] = None
+    stats["max"] = samples[-1] * 1000 if samples else None
+    return stats
+
+
+def start_lab1(workdir):
+    """Start a lab1 server on a copy of the database; return it."""
+    db_file = os.path.join(workdir, "fortune.db")
+    shutil.copyfile(opts.db, db_file)
+    server = os.path.abspath(opts.server)
+    args = [sys.executable, server, "-p", str(opts.port), "-f", db_file]
+    args = args + shlex.split(opts.server_args)
+    # Run the server in workdir, where it writes its address, with the
+    # modules next to it.
+    modules = os.path.join(os.path.dirname(server), "..", "modules")
+    env = dict(os.environ, PYTHONPATH=modules)
+    proc = subprocess.Popen(args, cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL,
+                            preexec_fn=restore_sigint)
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", opts.port), 1).close()
+            return proc
+        except OSError:
+            if proc.poll() is not None or time.monotonic() > deadline:
+                proc.kill()
+                sys.exit("The lab1 server did not start.")
+            time.sleep(0.05)
+
+
+def restore_sigint():
+    # The server stops on Ctrl-C, even if it is ignored here (e.g. when
+    # the benchmark runs in the background).
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+
+
+def stop_lab1(proc):
+    proc.send_signal(signal.SIGINT)
+    try:
+        proc.wait(5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def targets():
+    """Return the addresses the clients connect to."""
+    if opts.address is not None:
+        return [opts.address]
+    if opts.lab1:
+        return [("127.0.0.1", opts.port)]
+    ns = orb.Stub(opts.name_service)
+    replicas = [tuple(addr) for pid, addr in ns.require_all(opts.type)]
+    if not replicas:
+        sys.exit("No replica of type {} is registered.".format(opts.type))
+    return replicas
+
+
+def run(addresses):
+    """Run the clients; return the results."""
+    start = time.monotonic() + 0.1
+    begin = start + opts.warmup
+    end = begin + opts.duration
+    interval = None
+    if opts.rate is not None:
+        interval = opts.clients / opts.rate
+    clients = []
+    for i in range(opts.clients):
+        # Stagger the schedules of the clients evenly.
+        first = start + i / opts.rate if interval is not None else None
+        clients.append(Client(addresses[i % len(addresses)], i, begin, end,
+                              first, interval))
+    for c in clients:
+        c.start()
+    for c in clients:
+        c.join(max(end - time.monotonic(), 0) + opts.timeout + 1)
+
+    errors = {}
+    service = {"read": [], "write": []}
+    response = {"read": [], "write": []}
+    for c in clients:
+        for kind in service:
+            service[kind].extend(c.service[kind])
+            response[kind].extend(c.response[kind])
+        for name, n in c.errors.items():
+            errors[name] = errors.get(name, 0) + n
+    ok = len(service["read"]) + len(service["write"])
+    service["all"] = service["read"] + service["write"]
+    if interval is None:
+        # Closed loop: correct with the interval at which a client sends.
+        median = percentiles(service["all"])["p50"] or 0
+        expected = opts.think + median / 1000
+        latency = dict((kind, {"raw": percentiles(s),
+                               "corrected": percentiles(corrected(s,
+                                                                  expected))})
+                       for kind, s in service.items())
+    else:
+        # Open loop: the latency from the scheduled time is the corrected
+        # one.
+        response["all"] = response["read"] + response["write"]
+        latency = dict((kind, {"raw": percentiles(service[kind]),
+                               "corrected": percentiles(response[kind])})
+                       for kind in service)
+    return {
+        "target": ["{}:{}".format(*addr) for addr in addresses],
+        "clients": opts.clients,
+        "loop": "closed" if interval is None else "open",
+        "rate": opts.rate,
+        "duration": opts.duration,
+        "writes": opts.writes,
+        "read_many": opts.read_many,
+        "size": opts.size,
+        "framing": framing.BINARY if opts.binary else "json",
+        "requests": ok + sum(errors.values()),
+        "ok": ok,
+        "errors": errors,
+        "throughput": ok / opts.duration,
+        "latency_ms": latency
+    }
+
+
+def report(results):
+    print("{} clients, {} loop{}, {:.0%} writes, {} fortunes per read, "
+          "{} s".format(results["clients"], results["loop"],
+                        " at {:.0f}/s".format(results["rate"])
+                        if results["rate"] else "",
+                        results["writes"], results["read_many"],
+                        results["duration"]))
+    print("target: {} ({})".format(", ".join(results["target"]),
+                                    results["framing"]))
+    print("requests: {} ok, {} failed{}".format(
+        results["ok"], results["requests"] - results["ok"],
+        "".join(" {}: {}".format(name, n)
+                for name, n in sorted(results["errors"].items()))))
+    print("throughput: {:.1f} requests/s".format(results["throughput"]))
+    print("{:<6} {:<10} {:>8} {:>9} {:>9} {:>9} {:>9} {:>9}".format(
+        "kind", "latency", "count", "p50 ms", "p90 ms", "p99 ms",
+        "p999 ms", "max ms"))
+    for kind in ["read", "write", "all"]:
+        for which in ["raw", "corrected"]:
+            stats = results["latency_ms"][kind][which]
+            if not stats["count"]:
+                continue
+            print("{:<6} {:<10} {:>8}".format(kind, which, stats["count"]) +
+                  "".join(" {:>9.3f}".format(stats[name]) for name in
+                          ["p50", "p90", "p99", "p999", "max"]))
+
+# -----------------------------------------------------------------------------
+# The main program
+# -----------------------------------------------------------------------------
+
+workdir = None
+server = None
+try:
+    if opts.lab1:
+        workdir = tempfile.mkdtemp(prefix="bench-")
+        server = start_lab1(workdir)
+    results = run(targets())
+finally:
+    if server is not None:
+        stop_lab1(server)
+    if workdir is not None:
+        shutil.rmtree(workdir)
+
+if opts.json != "-":
+    report(results)
+if opts.json is not None:
+    if opts.json == "-":
+        print(json.dumps(results, indent=4, sort_keys=True))
+    else:
+        with open(opts.json, "w") as f:
+            json.dump(results, f, indent=4, sort_keys=True)
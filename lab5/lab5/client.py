@@ -12,6 +12,7 @@
 """Client reader/writer for a fortune database."""
 
 import sys
+import json
 import argparse
 
 sys.path.append("../modules")
@@ -36,6 +37,32 @@ parser.add_argument(
     "-i", "--interactive", action="store_true", dest="interactive",
     default=False, help="Interactive session with the fortune database."
 )
+parser.add_argument(
+    "-n", "--read-many", metavar="N", dest="read_many", type=int,
+    help="Read N random fortunes from the database in a single request."
+)
+parser.add_argument(
+    "-l", "--load", metavar="FILE", dest="load",
+    help="Write all the fortunes of FILE to the database. The fortunes "
+         "are separated by lines containing only '%%', as in dbs/fortune.db."
+)
+parser.add_argument(
+    "-b", "--batch-size", metavar="SIZE", dest="batch_size", type=int,
+    default=1000, help="Number of fortunes sent per request by --load. "
+                       "Default: 1000."
+)
+parser.add_argument(
+    "-s", "--search", metavar="TERM", dest="search",
+    help="Print the fortunes containing all the words of TERM."
+)
+parser.add_argument(
+    "-m", "--matching", metavar="TERM", dest="matching",
+    help="Read a random fortune containing all the words of TERM."
+)
+parser.add_argument(
+    "--limit", metavar="N", dest="limit", type=int, default=10,
+    help="Maximum number of fortunes printed by --search. Default: 10."
+)
 parser.add_argument(
     "-t", "--type", metavar="TYPE", dest="type", default=object_type,
     help="Set the client's type."
@@ -44,12 +71,32 @@ parser.add_argument(
     "-p", "--peer", metavar="PEER_ID", dest="peer_id", type=int,
     help="The identifier of a particular server peer."
 )
+parser.add_argument(
+    "--stats", action="store_true", dest="stats", default=False,
+    help="Print the statistics of the server: database and lock."
+)
 opts = parser.parse_args()
 
 server_type = opts.type
 server_id = opts.peer_id
 assert server_type != "object", "Change the object type to something unique!"
 
+
+def read_fortunes(path):
+    """Return the fortunes of a '%'-separated fortune file."""
+    with open(path, 'r') as f:
+        text = f.read()
+    fortunes = [fortune.strip("\n") for fortune in text.split("\n%\n")]
+    return [fortune for fortune in fortunes if fortune.strip() != ""]
+
+
+def load(db, path, batch_size):
+    """Write the fortunes of a file to the database, in batches."""
+    fortunes = read_fortunes(path)
+    for i in range(0, len(fortunes), batch_size):
+        db.write_many(fortunes[i:i + batch_size])
+    return len(fortunes)
+
 # -----------------------------------------------------------------------------
 # The main program
 # -----------------------------------------------------------------------------
@@ -72,6 +119,19 @@ if not opts.interactive:
     if opts.fortune is not None:
         print("Writing '{}' to the fortune database.".format(opts.fortune))
         db.write(opts.fortune)
+    elif opts.load is not None:
+        n = load(db, opts.load, opts.batch_size)
+        print("Wrote {} fortunes.".format(n))
+    elif opts.read_many is not None:
+        for fortune in db.read_many(opts.read_many):
+            print(fortune)
+    elif opts.search is not None:
+        for fortune in db.search(opts.search, opts.limit):
+            print(fortune)
+    elif opts.matching is not None:
+        print(db.random_matching(opts.matching))
+    elif opts.stats:
+        print(json.dumps(db.stats(), indent=4, sort_keys=True))
     else:
         print(db.read())
 
@@ -82,6 +142,10 @@ else:
 Choose one of the following commands:
     r            ::  read a random fortune from the database,
     w <FORTUNE>  ::  write a new fortune into the database,
+    m <N>        ::  read N random fortunes from the database,
+    l <FILE>     ::  write all the fortunes of FILE into the database,
+    s <TERM>     ::  print the fortunes containing all the words of TERM,
+    f <TERM>     ::  read a random fortune containing the words of TERM,
     h            ::  print this menu,
     q            ::  exit.\
 """)
@@ -96,5 +160,20 @@ Choose one of the following commands:
         elif (len(command) > 1 and command[0] == "w" and
                 command[1] in [" ", "\t"]):
             db.write(command[2:].strip())
+        elif (len(command) > 1 and command[0] == "m" and
+                command[1] in [" ", "\t"]):
+            for fortune in db.read_many(int(command[2:].strip())):
+                print(fortune)
+        elif (len(command) > 1 and command[0] == "l" and
+                command[1] in [" ", "\t"]):
+            n = load(db, command[2:].strip(), opts.batch_size)
+            print("Wrote {} fortunes.".format(n))
+        elif (len(command) > 1 and command[0] == "s" and
+                command[1] in [" ", "\t"]):
+            for fortune in db.search(command[2:].strip(), opts.limit):
+                print(fortune)
+        elif (len(command) > 1 and command[0] == "f" and
+                command[1] in [" ", "\t"]):
+            print(db.random_matching(command[2:].strip()))
         elif command == "h":
             menu()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Checker of the records of a fortune log."""
+
+import time
+import argparse
+
+import sys
+sys.path.append("../modules")
+from Server.Storage import logStore
+
+# -----------------------------------------------------------------------------
+# Initialize and read the command line arguments
+# -----------------------------------------------------------------------------
+
+description = """\
+Check the checksum of every record of a fortune log (see dbConvert.py),
+with a pool of processes. The exit status is 1 if a record is damaged.\
+"""
+parser = argparse.ArgumentParser(description=description)
+parser.add_argument(
+    "file", metavar="FILE",
+    help="Fortune log to check."
+)
+parser.add_argument(
+    "-p", "--processes", metavar="N", dest="processes", type=int,
+    default=None,
+    help="Number of processes checking the log. Default: one per CPU."
+)
+opts = parser.parse_args()
+
+# -----------------------------------------------------------------------------
+# The main program
+# -----------------------------------------------------------------------------
+
+start = time.perf_counter()
+checked, bad = logStore.verify(opts.file, opts.processes)
+elapsed = time.perf_counter() - start
+print("Checked {} records in {:.2f} s.".format(checked, elapsed))
+for offset in bad:
+    print("Torn or damaged record at offset {}.".format(offset))
+sys.exit(1 if bad else 0)
@@ -54,6 +54,49 @@ parser.add_argument(
     "-f", "--file", metavar="FILE", dest="file", default="dbs/fortune.db",
     help="Set the database file. Default: dbs/fortune.db."
 )
+parser.add_argument(
+    "-e", "--engine", "-s", "--storage", metavar="ENGINE", dest="engine",
+    default="memory",
+    choices=["memory", "array", "mmap", "block", "log", "sqlite"],
+    help="Set the storage engine of the database: 'memory' loads the "
+         "whole file as a list of strings, 'array' packs it in a single "
+         "buffer, 'mmap' maps it and indexes the record offsets, 'block' "
+         "reads a block-compressed file, 'log' a checksummed record log "
+         "and 'sqlite' an SQLite database (see dbConvert.py). "
+         "Default: memory."
+)
+parser.add_argument(
+    "-d", "--durability", metavar="DURABILITY", dest="durability",
+    default="flush", choices=["buffered", "flush", "fsync"],
+    help="Set when a write is considered done: 'buffered' once it is in "
+         "the file buffer, 'flush' once it is handed to the OS, 'fsync' "
+         "once it is on the disk. Default: flush."
+)
+parser.add_argument(
+    "-S", "--search-index", action="store_true", dest="search_index",
+    default=False,
+    help="Index the words of the fortunes to answer search requests."
+)
+parser.add_argument(
+    "-F", "--follow", action="store_true", dest="follow", default=False,
+    help="Watch the database file and serve the fortunes appended to it "
+         "by other programs without a restart."
+)
+parser.add_argument(
+    "--fair-lock", action="store_true", dest="fair_lock", default=False,
+    help="Use a phase-fair readers-writer lock, so that writers are not "
+         "starved by a steady flow of readers."
+)
+parser.add_argument(
+    "--snapshots", action="store_true", dest="snapshots", default=False,
+    help="Serve reads from the snapshot published by the last write, "
+         "without taking the readers-writer lock."
+)
+parser.add_argument(
+    "--lock-stats", action="store_true", dest="lock_stats", default=False,
+    help="Record the wait and hold times of the readers-writer lock, "
+         "returned by the stats request."
+)
 opts = parser.parse_args()
 
 local_port = opts.port
@@ -71,14 +114,20 @@ class Server(orb.Peer):
 
     """Distributed mutual exclusion client class."""
 
-    def __init__(self, local_address, ns_address, server_type, db_file):
+    def __init__(self, local_address, ns_address, server_type, db_file,
+                 engine="memory", durability="flush", search_index=False,
+                 follow=False, fair_lock=False, snapshots=False,
+                 lock_stats=False):
         """Initialize the client."""
 
         orb.Peer.__init__(self, local_address, ns_address, server_type)
         self.peer_list = PeerList(self)
         self.distributed_lock = DistributedLock(self, self.peer_list)
-        self.drwlock = DistributedReadWriteLock(self.distributed_lock)
-        self.db = database.Database(db_file)
+        self.drwlock = DistributedReadWriteLock(self.distributed_lock,
+                                                fair_lock, lock_stats)
+        self.db = database.Database(db_file, engine, durability,
+                                    search_index, follow,
+                                    snapshots=snapshots)
         self.dispatched_calls = {
             "display_peers":      self.peer_list.display_peers,
             "acquire":            self.distributed_lock.acquire,
@@ -115,6 +164,8 @@ class Server(orb.Peer):
         #
         # Your code here.
         #
+        if self.db.snapshots:
+            return self.db.read()
         self.drwlock.read_acquire()
         try:
             return self.db.read()
@@ -129,6 +180,10 @@ class Server(orb.Peer):
         atempt to obtain the distributed lock when writing their
         copies.
 
+        The fortune is written only once the lock is held, so that the
+        commit holds this fortune alone: every replica then applies the
+        writes in the order of the distributed lock.
+
         """
         self.drwlock.write_acquire()
         try:
@@ -145,6 +200,51 @@ class Server(orb.Peer):
         #
             
 
+    def read_many(self, n):
+        """Read n random fortunes from the database."""
+
+        if self.db.snapshots:
+            return self.db.read_many(n)
+        self.drwlock.read_acquire()
+        try:
+            return self.db.read_many(n)
+        finally:
+            self.drwlock.read_release()
+
+    def search(self, term, limit=10):
+        """Return at most limit fortunes containing all words of term."""
+
+        self.drwlock.read_acquire()
+        try:
+            return self.db.search(term, limit)
+        finally:
+            self.drwlock.read_release()
+
+    def random_matching(self, term):
+        """Return a random fortune containing all words of term."""
+
+        self.drwlock.read_acquire()
+        try:
+            return self.db.random_matching(term)
+        finally:
+            self.drwlock.read_release()
+
+    def write_many(self, fortunes):
+        """Write several fortunes to the database.
+
+        The distributed lock is obtained once for the whole batch, and
+        the batch is sent to each of the other servers in a single call
+        to their 'write_many_local'.
+
+        """
+        self.drwlock.write_acquire()
+        try:
+            self.db.write_many(fortunes)
+            for pid in self.peer_list.get_peers():
+                self.peer_list.peer(pid).write_many_local(fortunes)
+        finally:
+            self.drwlock.write_release()
+
     def write_local(self, fortune):
         """Write a fortune to the database.
 
@@ -159,6 +259,27 @@ class Server(orb.Peer):
         finally:
             self.drwlock.write_release_local()
 
+    def write_many_local(self, fortunes):
+        """Write several fortunes to the database.
+
+        This is the batch version of 'write_local', called only by
+        other servers once they've obtained the distributed lock.
+
+        """
+
+        self.drwlock.write_acquire_local()
+        try:
+            self.db.write_many(fortunes)
+        finally:
+            self.drwlock.write_release_local()
+
+    def stats(self):
+        """Return statistics about the database and its lock."""
+
+        stats = self.db.stats()
+        stats["lock"] = self.drwlock.stats()
+        return stats
+
     def register_peer(self, pid, paddr):
         """Register a server peer in this server's peer list."""
 
@@ -177,7 +298,9 @@ class Server(orb.Peer):
 
 # Initialize the client object.
 local_address = (socket.gethostname(), local_port)
-p = Server(local_address, name_service_address, server_type, db_file)
+p = Server(local_address, name_service_address, server_type, db_file,
+           opts.engine, opts.durability, opts.search_index, opts.follow,
+           opts.fair_lock, opts.snapshots, opts.lock_stats)
 
 
 def menu():
@@ -185,6 +308,7 @@ def menu():
 Choose one of the following commands:
     l  ::  list peers,
     s  ::  display status,
+    d  ::  display database statistics,
     h  ::  print this menu,
     q  ::  exit.\
 """)
@@ -200,6 +324,8 @@ while command != "q":
             p.display_peers()
         elif command == "s":
             p.display_status()
+        elif command == "d":
+            print(p.stats())
         elif command == "h":
             menu()
     except KeyboardInterrupt:
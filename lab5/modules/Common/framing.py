@@ -0,0 +1,223 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Length-prefixed binary framing of the messages of the protocols.
+
+The messages of the lab1 server and of the orb are JSON objects, sent
+one per line by default. A client may ask to switch a connection to
+binary frames with a first request, sent as a JSON line:
+
+    {"method": "_negotiate", "args": [BINARY]}
+
+A server that knows the framing answers {"result": BINARY} and both
+sides then send frames: a FRAME_HEADER (the length of the payload)
+followed by the payload, the message encoded with encode(). Any other
+answer (an error, from a server that does not know the method) means
+that the connection stays with JSON lines.
+
+The encoding covers the JSON values, with the same meaning: a tag byte,
+then a fixed size value, or a length and the items (one byte for short
+strings and small integers). Strings are sent as
+their UTF-8 bytes, without escapes, so a payload is encoded and decoded
+without scanning it for newlines or quotes.
+
+"""
+
+import json
+import struct
+
+BINARY = "binary1"
+NEGOTIATE = "_negotiate"
+
+FRAME_HEADER = struct.Struct("!I")
+LENGTH = struct.Struct("!I")
+INTEGER = struct.Struct("!q")
+FLOAT = struct.Struct("!d")
+
+# Strings shorter than this have a single byte length.
+SHORT = 256
+
+# Frames larger than this are refused, as a corrupt or hostile length.
+MAX_FRAME = 2 ** 30
+
+
+class FramingError(Exception):
+    pass
+
+
+def _encode_str(value, parts):
+    data = value.encode()
+    if len(data) < SHORT:
+        parts.append(b'S' + bytes((len(data),)) + data)
+    else:
+        parts.append(b's' + LENGTH.pack(len(data)))
+        parts.append(data)
+
+
+def _encode_int(value, parts):
+    if 0 <= value < 256:
+        parts.append(b'j' + bytes((value,)))
+    elif -2 ** 63 <= value < 2 ** 63:
+        parts.append(b'i' + INTEGER.pack(value))
+    else:
+        data = str(value).encode()
+        parts.append(b'n' + LENGTH.pack(len(data)))
+        parts.append(data)
+
+
+def _encode_float(value, parts):
+    parts.append(b'd' + FLOAT.pack(value))
+
+
+def _encode_list(value, parts):
+    parts.append(b'l' + LENGTH.pack(len(value)))
+    for item in value:
+        _encoders[type(item)](item, parts)
+
+
+def _encode_dict(value, parts):
+    parts.append(b'm' + LENGTH.pack(len(value)))
+    for key, item in value.items():
+        if type(key) is not str:
+            # JSON turns the keys into strings.
+            key = json.dumps(key)
+        _encode_str(key, parts)
+        _encoders[type(item)](item, parts)
+
+
+def _encode_constant(value, parts):
+    parts.append(b'N' if value is None else b'T' if value else b'F')
+
+
+_encoders = {
+    str: _encode_str,
+    int: _encode_int,
+    float: _encode_float,
+    bool: _encode_constant,
+    type(None): _encode_constant,
+    list: _encode_list,
+    tuple: _encode_list,
+    dict: _encode_dict
+}
+
+
+def encode(message):
+    """Return the binary encoding of a JSON value."""
+    parts = []
+    try:
+        _encoders[type(message)](message, parts)
+    except KeyError as e:
+        raise TypeError("Cannot encode an object of type {}."
+                        .format(e.args[0].__name__))
+    return b''.join(parts)
+
+
+def _decode(data, pos):
+    """Decode the value at offset pos of data; return it and its end."""
+    tag = data[pos]
+    pos = pos + 1
+    if tag == 0x53:  # 'S'
+        end = pos + 1 + data[pos]
+        return str(data[pos + 1:end], "utf-8"), end
+    if tag == 0x6a:  # 'j'
+        return data[pos], pos + 1
+    if tag == 0x73:  # 's'
+        length = LENGTH.unpack_from(data, pos)[0]
+        pos = pos + LENGTH.size
+        return str(data[pos:pos + length], "utf-8"), pos + length
+    if tag == 0x69:  # 'i'
+        return INTEGER.unpack_from(data, pos)[0], pos + INTEGER.size
+    if tag == 0x6c:  # 'l'
+        count = LENGTH.unpack_from(data, pos)[0]
+        pos = pos + LENGTH.size
+        items = []
+        for i in range(count):
+            item, pos = _decode(data, pos)
+            items.append(item)
+        return items, pos
+    if tag == 0x6d:  # 'm'
+        count = LENGTH.unpack_from(data, pos)[0]
+        pos = pos + LENGTH.size
+        items = {}
+        for i in range(count):
+            key, pos = _decode(data, pos)
+            items[key], pos = _decode(data, pos)
+        return items, pos
+    if tag == 0x4e:  # 'N'
+        return None, pos
+    if tag == 0x54:  # 'T'
+        return True, pos
+    if tag == 0x46:  # 'F'
+        return False, pos
+    if tag == 0x64:  # 'd'
+        return FLOAT.unpack_from(data, pos)[0], pos + FLOAT.size
+    if tag == 0x6e:  # 'n'
+        length = LENGTH.unpack_from(data, pos)[0]
+        pos = pos + LENGTH.size
+        return int(str(data[pos:pos + length], "ascii")), pos + length
+    raise FramingError("Unknown tag {!r} at offset {}.".format(tag, pos - 1))
+
+
+def decode(data):
+    """Return the JSON value encoded in data."""
+    try:
+        value, end = _decode(data, 0)
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise FramingError("Truncated or corrupt payload: {}".format(e))
+    if end != len(data):
+        raise FramingError("Trailing bytes after the payload.")
+    return value
+
+
+def pack(message):
+    """Return the frame of a message."""
+    payload = encode(message)
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def read_frame(reader):
+    """Read a frame from a binary file; return its message.
+
+    Return None at the end of the file, between two frames.
+
+    """
+    header = reader.read(FRAME_HEADER.size)
+    if not header:
+        return None
+    if len(header) < FRAME_HEADER.size:
+        raise FramingError("Truncated frame header.")
+    length = FRAME_HEADER.unpack(header)[0]
+    if length > MAX_FRAME:
+        raise FramingError("Frame of {} bytes refused.".format(length))
+    payload = reader.read(length)
+    if len(payload) < length:
+        raise FramingError("Truncated frame.")
+    return decode(payload)
+
+
+async def read_frame_async(reader):
+    """Read a frame from an asyncio StreamReader, like read_frame()."""
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except EOFError as e:
+        if e.partial:
+            raise FramingError("Truncated frame header.")
+        return None
+    length = FRAME_HEADER.unpack(header)[0]
+    if length > MAX_FRAME:
+        raise FramingError("Frame of {} bytes refused.".format(length))
+    try:
+        return decode(await reader.readexactly(length))
+    except EOFError:
+        raise FramingError("Truncated frame.")
+
+
+def negotiate(offered):
+    """Return the framing a server picks among the offered ones."""
+    return BINARY if BINARY in offered else "json"
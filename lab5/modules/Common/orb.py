@@ -10,6 +10,10 @@
 import threading
 import socket
 import json
+import select
+import builtins
+
+from . import framing
 
 """Object Request Broker
 
@@ -40,42 +44,110 @@ class Stub(object):
 
     This is  wrapper object for a socket.
 
+    The stub keeps the connections of finished calls open and reuses
+    them for the next calls; each new connection asks for binary frames
+    (see the framing module). A server that does not know them (e.g. an
+    older name service) answers with an error and closes the connection
+    after one request: the stub then sends JSON lines on a connection
+    per call to that address.
+
     """
 
     def __init__(self, address):
         self.address = tuple(address)
+        self.lock = threading.Lock()
+        self.idle = []
+        self.reuse = True
 
-    def _rmi(self, method, *args):
-        #
-        # Your code here.
-        #
+    # Private methods
 
-        sock = socket.create_connection(self.address) #what if it cant connect?
-        conn = sock.makefile(mode="rw")
-        
-        # make our message and send it
-        data = json.dumps({"method":method,"args":args}) + '\n'
-        
-        conn.write(data)
-        conn.flush()
+    def _connect(self):
+        """Return an idle connection, or a new one."""
+        while True:
+            self.lock.acquire()
+            try:
+                conn = self.idle.pop() if self.idle else None
+            finally:
+                self.lock.release()
+            if conn is None:
+                break
+            # Drop the connections that the server has closed.
+            sock = conn[0]
+            readable, w, x = select.select([sock], [], [], 0)
+            if not readable or sock.recv(1, socket.MSG_PEEK):
+                return conn
+            self._close(conn)
+        conn = self._open()
+        if not self.reuse:
+            return conn
+        self._send(conn, {"method": framing.NEGOTIATE,
+                          "args": [framing.BINARY]})
+        res = self._receive(conn)
+        if res is not None and "result" in res:
+            conn[3] = res["result"]
+            return conn
+        # The server only knows JSON lines, a request per connection.
+        self.reuse = False
+        self._close(conn)
+        return self._open()
+
+    def _open(self):
+        """Return a new connection: socket, reader, writer, framing."""
+        sock = socket.create_connection(self.address)
+        return [sock, sock.makefile(mode="rb"), sock.makefile(mode="wb"),
+                "json"]
+
+    def _close(self, conn):
+        conn[2].close()
+        conn[1].close()
+        conn[0].close()
+
+    def _send(self, conn, msg):
+        if conn[3] == framing.BINARY:
+            conn[2].write(framing.pack(msg))
+        else:
+            conn[2].write((json.dumps(msg) + '\n').encode())
+        conn[2].flush()
+
+    def _receive(self, conn):
+        """Read a message from conn; return None if it was closed."""
+        if conn[3] == framing.BINARY:
+            return framing.read_frame(conn[1])
+        line = conn[1].readline()
+        return json.loads(line) if line else None
 
-        #read the reply and unpack it
-        res = json.loads(conn.readline())
-        conn.close()
+    def _rmi(self, method, *args):
+        conn = self._connect()
+        try:
+            self._send(conn, {"method": method, "args": args})
+            res = self._receive(conn)
+        except Exception:
+            self._close(conn)
+            raise
+        if res is None:
+            self._close(conn)
+            raise CommunicationError("The server closed the connection.")
+        if self.reuse:
+            self.lock.acquire()
+            try:
+                self.idle.append(conn)
+            finally:
+                self.lock.release()
+        else:
+            self._close(conn)
 
         if "error" in res:
             # #there has been an exception on the server,
             # #find out which and raise it here on the client
             err = res["error"]
-            exc = getattr(globals(), err["name"], None)
+            exc = (globals().get(err["name"]) or
+                   getattr(builtins, err["name"], None))
 
             if exc is not None:
                 raise exc(*err["args"])
 
         return res.get("result")
 
-        #end my code
-
     def __getattr__(self, attr):
         """Forward call to name over the network at the given address."""
         def rmi_call(*args):
@@ -85,7 +157,13 @@ class Stub(object):
 
 class Request(threading.Thread):
 
-    """Run the incoming requests on the owner object of the skeleton."""
+    """Run the incoming requests on the owner object of the skeleton.
+
+    The requests of a connection are answered in turn, until the client
+    closes it. A _negotiate request switches the connection to binary
+    frames.
+
+    """
 
     def __init__(self, owner, conn, addr):
         threading.Thread.__init__(self)
@@ -93,35 +171,50 @@ class Request(threading.Thread):
         self.conn = conn
         self.owner = owner
         self.daemon = True
+        self.framing = "json"
 
-    def run(self):
-
-        #
-        # Your code here.
-
+    def _answer(self, req):
         try:
-            w = self.conn.makefile(mode="rw")
-            req = json.loads(w.readline())
-
+            if req["method"] == framing.NEGOTIATE:
+                return {"result": framing.negotiate(req["args"])}
 
             #get the corresponding method of the owner
             method = getattr(self.owner,req["method"])
-            
-            #invoke the method and send the result
-            ret = method(*req["args"])
 
-            w.write(json.dumps({"result":ret}) + '\n')
-            w.flush()
+            #invoke the method and send the result
+            return {"result": method(*req["args"])}
         except Exception as e:
-            w = self.conn.makefile(mode="rw")
-            w.write(json.dumps({"error":{"name":e.__class__.__name__,
-                                         "args":e.args}}) + '\n')
-            w.flush()
+            return {"error":{"name":e.__class__.__name__,
+                             "args":e.args}}
+
+    def run(self):
+        try:
+            reader = self.conn.makefile(mode="rb")
+            writer = self.conn.makefile(mode="wb")
+            while True:
+                if self.framing == framing.BINARY:
+                    req = framing.read_frame(reader)
+                    if req is None:
+                        break
+                else:
+                    line = reader.readline()
+                    if not line:
+                        break
+                    req = json.loads(line)
+                res = self._answer(req)
+                if self.framing == framing.BINARY:
+                    writer.write(framing.pack(res))
+                else:
+                    writer.write((json.dumps(res) + '\n').encode())
+                writer.flush()
+                if req["method"] == framing.NEGOTIATE and "result" in res:
+                    self.framing = res["result"]
+        except (OSError, ValueError, framing.FramingError):
+            # The client is gone, or sent garbage.
+            pass
         finally:
             self.conn.close()
 
-        #end my code
-
 
 class Skeleton(threading.Thread):
 
@@ -142,7 +235,7 @@ class Skeleton(threading.Thread):
 
         self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server.bind(self.address)
-        self.server.listen(1)
+        self.server.listen(socket.SOMAXCONN)
 
         # end my code
 
@@ -28,6 +28,7 @@ The implementation should satisfy the following requests:
 
 """
 
+import time
 from threading import Event
 
 NO_TOKEN = 0
@@ -47,7 +48,7 @@ class DistributedLock(object):
         --  destroy()
         --  register_peer(pid)
         --  unregister_peer(pid)
-        --  acquire()
+        --  acquire(timeout=-1)
         --  release()
         --  request_token(time, pid)
         --  obtain_token(token)
@@ -62,6 +63,7 @@ class DistributedLock(object):
         self.token = None
         self.request = {}
         self.state = NO_TOKEN
+        self.waiting = False
         self.wait_event = Event()
 
     def _prepare(self, token):
@@ -163,9 +165,16 @@ class DistributedLock(object):
         finally:
             self.peer_list.lock.release()
 
-    def acquire(self):
-        """Called when this object tries to acquire the lock."""
+    def acquire(self, timeout=-1):
+        """Called when this object tries to acquire the lock.
+
+        If timeout is not negative, give up waiting for the token after
+        timeout seconds. Return whether the lock was acquired; a token
+        arriving after we gave up is passed on to the next requester.
+
+        """
         print("Trying to acquire the lock...")
+        deadline = None if timeout < 0 else time.monotonic() + timeout
         #
         # Your code here.
         #
@@ -177,7 +186,8 @@ class DistributedLock(object):
             if self.state == TOKEN_PRESENT:
                 #we already have the token so no need to request it
                 self.state = TOKEN_HELD
-                return
+                return True
+            self.waiting = True
 
         finally:
             self.peer_list.lock.release()
@@ -192,12 +202,18 @@ class DistributedLock(object):
 
         print("waiting for token...")
         while self.state == NO_TOKEN:
-            pass
+            if deadline is not None and time.monotonic() >= deadline:
+                break
 
         self.peer_list.lock.acquire()
         try:
+            self.waiting = False
+            if self.state == NO_TOKEN:
+                print("Gave up waiting for the token.")
+                return False
             self.state = TOKEN_HELD
             print("Got the token!")
+            return True
         finally:
             self.peer_list.lock.release()
 
@@ -293,6 +309,9 @@ class DistributedLock(object):
             self.token = self._unprepare(token)
             self.token[self.owner.id] = self.time
             self.state = TOKEN_PRESENT
+            if not self.waiting:
+                # We gave up waiting for it; the others may still be.
+                self.release()
             print("set the flag")
             #self.wait_event.set()
             print("the flag has been set")
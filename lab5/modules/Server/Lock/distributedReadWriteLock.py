@@ -10,15 +10,32 @@
 """Class implementing a distributed version of ReadWriteLock."""
 
 import threading
+import time
 from . import readWriteLock
+from .lockStats import LockStats
 
 
 class DistributedReadWriteLock(readWriteLock.ReadWriteLock):
 
-    """Distributed version of ReadWriteLock."""
+    """Distributed version of ReadWriteLock.
 
-    def __init__(self, distributed_lock):
-        readWriteLock.ReadWriteLock.__init__(self)
+    fair selects the policy of the local lock, see ReadWriteLock. If
+    instrument is True, the LockStats also cover the "distributed_write"
+    accesses: the whole of write_acquire(), including the wait for the
+    token of the distributed lock, while "write" only covers the local
+    lock, also taken on behalf of the other peers.
+
+    write_acquire() and write_acquire_local() take the blocking and
+    timeout arguments of ReadWriteLock.write_acquire(); the timeout
+    covers the wait for the token too.
+
+    """
+
+    def __init__(self, distributed_lock, fair=False, instrument=False):
+        readWriteLock.ReadWriteLock.__init__(self, fair)
+        if instrument:
+            self.lock_stats = LockStats(("read", "write",
+                                         "distributed_write"))
         # Create a distributed lock
         self.distributed_lock = distributed_lock
         #
@@ -28,11 +45,11 @@ class DistributedReadWriteLock(readWriteLock.ReadWriteLock):
 
     # Public methods
 
-    def write_acquire(self):
+    def write_acquire(self, blocking=True, timeout=-1):
         """Acquire the rights to write into the database.
 
         Override the write_acquire method to include obtaining access
-        to the rest of the peers.
+        to the rest of the peers. Return whether they were acquired.
 
         """
 
@@ -40,11 +57,36 @@ class DistributedReadWriteLock(readWriteLock.ReadWriteLock):
         # Your code here.
         #
 
-        
-        self.lock_of_locks.acquire()
-        self.distributed_lock.acquire()
-        self.write_acquire_local()
-        
+        deadline = readWriteLock._deadline(blocking, timeout)
+        start = None
+        if self.lock_stats is not None:
+            start = self.lock_stats.arrive("distributed_write",
+                                           self.lock_of_locks.locked())
+        acquired = self._distributed_acquire(deadline)
+        if start is not None:
+            if acquired:
+                self.lock_stats.acquired("distributed_write", start)
+            else:
+                self.lock_stats.gave_up("distributed_write")
+        return acquired
+
+    def _remaining(self, deadline):
+        if deadline is None:
+            return -1
+        return max(deadline - time.monotonic(), 0)
+
+    def _distributed_acquire(self, deadline):
+        if not readWriteLock._acquire(self.lock_of_locks, deadline):
+            return False
+        if not self.distributed_lock.acquire(self._remaining(deadline)):
+            self.lock_of_locks.release()
+            return False
+        if not self.write_acquire_local(
+                timeout=self._remaining(deadline)):
+            self.distributed_lock.release()
+            self.lock_of_locks.release()
+            return False
+        return True
 
     def write_release(self):
         """Release the rights to write into the database.
@@ -57,6 +99,8 @@ class DistributedReadWriteLock(readWriteLock.ReadWriteLock):
         #
         # Your code here.
         #
+        if self.lock_stats is not None:
+            self.lock_stats.released("distributed_write")
         self.write_release_local()
 
         self.distributed_lock.release()
@@ -65,8 +109,9 @@ class DistributedReadWriteLock(readWriteLock.ReadWriteLock):
 
         
 
-    def write_acquire_local(self):
-        readWriteLock.ReadWriteLock.write_acquire(self)
+    def write_acquire_local(self, blocking=True, timeout=-1):
+        return readWriteLock.ReadWriteLock.write_acquire(self, blocking,
+                                                         timeout)
 
     def write_release_local(self):
         readWriteLock.ReadWriteLock.write_release(self)
@@ -0,0 +1,100 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Flat fortune file loaded into a list of strings."""
+
+from .appendFile import AppendFile
+from .fortuneFile import SEPARATOR, ENCODING
+from .storageEngine import StorageEngine
+
+
+class ListStore(StorageEngine):
+
+    """Fortune file read whole and split on the '%' characters.
+
+    This is the original storage of the database: simple, but every
+    record costs a Python string object and a list slot, and the whole
+    file is decoded when it is opened.
+
+    Public methods:
+        --  count()
+        --  get(index)
+        --  append_many(fortunes)
+        --  refresh()
+        --  iterate()
+        --  stats()
+        --  close()
+
+    """
+
+    def __init__(self, db_file, durability="flush"):
+        StorageEngine.__init__(self, db_file, durability)
+        f = open(db_file, 'r')
+        self.db = f.read().split('%')
+        self.end = f.tell()
+        f.close()
+        self.out = AppendFile(db_file, durability)
+
+    # Private methods
+
+    def _load_tail(self):
+        """Add the complete records appended after the end of self.db."""
+        with open(self.db_file, 'rb') as f:
+            f.seek(self.end)
+            data = f.read()
+        records = data.split(SEPARATOR)
+        rest = records.pop()
+        self.end = self.end + len(data) - len(rest)
+        self.db.extend(r.decode(ENCODING, "replace") for r in records)
+
+    # Public methods
+
+    def count(self):
+        """Return the number of records."""
+        return len(self.db)
+
+    def get(self, index):
+        """Return the record with the given index."""
+        return self.db[index]
+
+    def append_many(self, fortunes):
+        """Append several records with a single write to the file."""
+        data = "".join(f + "\n%\n" for f in fortunes).encode(ENCODING)
+        if self.out.size() > self.end:
+            # Another program has appended to the file since we last
+            # wrote to it: load its records first.
+            self.out.flush()
+            self._load_tail()
+        self.out.append(data)
+        # Skip an unterminated record another program may have left
+        # before ours.
+        self.end = self.out.tell()
+        self.db.extend(fortunes)
+
+    def refresh(self):
+        """Load the records appended to the file by other programs.
+
+        Return the number of new records.
+
+        """
+        before = len(self.db)
+        self.out.flush()
+        self._load_tail()
+        return len(self.db) - before
+
+    def iterate(self):
+        """Yield all the records in order."""
+        return iter(self.db)
+
+    def stats(self):
+        """Return the statistics of the writes to the file."""
+        return self.out.stats()
+
+    def close(self):
+        self.out.close()
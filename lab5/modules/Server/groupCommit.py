@@ -0,0 +1,122 @@
+# -----------------------------------------------------------------------------
+# Distributed Systems (TDDD25)
+# -----------------------------------------------------------------------------
+# Author: Sergiu Rafiliu (sergiu.rafiliu@liu.se)
+# Modified: 18 October 2026
+#
+# Copyright 2012 Linkoping University
+# -----------------------------------------------------------------------------
+
+"""Group commit of concurrent writes."""
+
+import threading
+
+
+class GroupCommit(object):
+
+    """Gathers the records of concurrent writers into a single commit.
+
+    A writer first calls enqueue() with its record (or enqueue_many()
+    with several records sharing one ticket), before taking the
+    exclusive writer lock, and then commit() with the returned ticket
+    once it holds the lock. The first writer to get the lock commits
+    all the records enqueued so far with a single call to the flush
+    function; the writers whose records were committed in that batch
+    find their ticket committed when they get the lock and return at
+    once. commit() must only be called by the holder of the exclusive
+    lock.
+
+    Public methods:
+        --  enqueue(record)
+        --  enqueue_many(records)
+        --  cancel(ticket)
+        --  commit(ticket)
+        --  stats()
+
+    """
+
+    def __init__(self, flush):
+        self.flush = flush
+        self.lock = threading.Lock()
+        self.pending = []
+        self.enqueued = 0
+        self.batches = 0
+        self.writes = 0
+        self.last_batch = 0
+        self.max_batch = 0
+        self.batch_sizes = {}
+
+    # Public methods
+
+    def enqueue(self, record):
+        """Queue a record for the next commit and return its ticket."""
+        return self.enqueue_many([record])
+
+    def enqueue_many(self, records):
+        """Queue several records under a single ticket."""
+        self.lock.acquire()
+        try:
+            self.enqueued = self.enqueued + 1
+            self.pending.append((self.enqueued, records))
+            return self.enqueued
+        finally:
+            self.lock.release()
+
+    def cancel(self, ticket):
+        """Remove the records of a ticket that is not committed yet.
+
+        Return False if the records have already been committed.
+
+        """
+        self.lock.acquire()
+        try:
+            for i, (t, records) in enumerate(self.pending):
+                if t == ticket:
+                    del self.pending[i]
+                    return True
+            return False
+        finally:
+            self.lock.release()
+
+    def commit(self, ticket):
+        """Commit the pending records, if ticket is still pending.
+
+        Return the number of records written by this call, 0 if the
+        records of the ticket were already committed by another writer.
+
+        """
+        self.lock.acquire()
+        try:
+            if not self.pending or ticket < self.pending[0][0]:
+                return 0
+            batch = self.pending
+            self.pending = []
+        finally:
+            self.lock.release()
+        try:
+            self.flush([r for t, records in batch for r in records])
+        except Exception:
+            # Leave the records of the other writers to the next one.
+            self.lock.acquire()
+            try:
+                self.pending[:0] = [(t, r) for t, r in batch if t != ticket]
+            finally:
+                self.lock.release()
+            raise
+        size = sum(len(records) for t, records in batch)
+        self.batches = self.batches + 1
+        self.writes = self.writes + size
+        self.last_batch = size
+        self.max_batch = max(self.max_batch, size)
+        self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+        return size
+
+    def stats(self):
+        """Return the number of writes in the commit batches so far."""
+        return {
+            "batches": self.batches,
+            "writes": self.writes,
+            "last_batch": self.last_batch,
+            "max_batch": self.max_batch,
+            "batch_sizes": sorted(self.batch_sizes.items())
+        }